@@ -27,6 +27,12 @@ logger = logging.getLogger(__name__)
 # 小红书笔记详情页前缀
 _NOTE_BASE_URL = "https://www.xiaohongshu.com"
 
+# 预编译正则（解析热路径上每张卡片 / 每个计数都会调用）
+# 匹配 "1.2万" 或 "1.2w"（大小写不敏感）
+_WAN_COUNT_RE = re.compile(r"^([\d.]+)\s*[万wW]$")
+# 从封面链接提取 xsec_token
+_XSEC_TOKEN_RE = re.compile(r"xsec_token=([^&]+)")
+
 
 def normalize_count(text: str) -> int:
     """将中文数字文本转换为整数。
@@ -48,8 +54,7 @@ def normalize_count(text: str) -> int:
 
     text = text.strip().replace(",", "")
 
-    # 匹配 "1.2万" 或 "1.2w"（大小写不敏感）
-    match = re.match(r"^([\d.]+)\s*[万wW]$", text)
+    match = _WAN_COUNT_RE.match(text)
     if match:
         try:
             return int(float(match.group(1)) * 10_000)
@@ -106,7 +111,7 @@ async def parse_search_card(card: "ElementHandle") -> dict | None:
         if cover_anchor:
             cover_href = await cover_anchor.get_attribute("href") or ""
             # 格式: /search_result/{note_id}?xsec_token=...&xsec_source=
-            token_match = re.search(r"xsec_token=([^&]+)", cover_href)
+            token_match = _XSEC_TOKEN_RE.search(cover_href)
             if token_match:
                 xsec_token = token_match.group(1)
             # 若隐藏链接未提取到 note_id，从封面链接降级提取
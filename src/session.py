@@ -29,9 +29,13 @@ from __future__ import annotations
 import asyncio
 import contextlib
 import logging
+import os
+import re
+import time
 from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
+from types import MappingProxyType
 from typing import AsyncGenerator, Optional
 
 import src.note
@@ -58,29 +62,125 @@ _DEFAULT_STORAGE_CONFIG: dict = {
 # 采集完整流程的 max_notes 上限（避免单次任务耗时过长）
 _MAX_NOTES_LIMIT = 20
 
+# 浏览器健康检查正结果的缓存时长（秒）：短时间内连续的采集调用共享一次 is_connected 探测
+_HEALTH_CHECK_TTL = 0.5
 
-def _extract_keyword_from_stem(stem: str) -> str:
-    """从文件名（不含扩展名）提取关键词。
+# 登录态"已登录"结果的缓存时长（秒）：期间 check_login_status 直接返回缓存，不再打开探测页面
+_LOGIN_OK_TTL = 30.0
+_LOGGED_IN_MESSAGE = "已登录，可正常使用采集功能。"
 
-    文件名格式：[notes_]{keyword}_{YYYYMMDD}_{HHMMSS}
-    例如：Python教程_20240315_143022  →  Python教程
-          notes_小红书技巧_20240315_143022  →  小红书技巧
+# get_saved_data 并发 stat 的最大在途数：
+# 网络盘 / 云盘上单次 stat 延迟较高，并发发起以隐藏延迟，同时避免占满默认线程池
+_STAT_CONCURRENCY = 32
+
+# 数据文件名格式：[notes_]{keyword}_{YYYYMMDD}_{HHMMSS}.(json|xlsx)
+# 例如：Python教程_20240315_143022.json  →  kw=Python教程, ts=20240315_143022
+#       notes_小红书技巧_20240315_143022.json  →  kw=小红书技巧（notes_ 为笔记详情文件前缀）
+# 数据文件扩展名：scandir 阶段先用 str.endswith(tuple) 廉价排除其他文件，再做正则完整校验
+_VALID_SUFFIXES = (".json", ".xlsx")
+_FILENAME_RE = re.compile(r"^(?:notes_)?(?P<kw>.+)_(?P<ts>\d{8}_\d{6})\.(?:json|xlsx)$")
+
+# 无参数错误的标准错误字典模板（只读），错误路径上按需浅拷贝，避免每次构造 CrawlerError
+_ERR_BROWSER_NOT_RUNNING = MappingProxyType(browser_not_running_error().to_dict())
+_ERR_BROWSER_CRASHED = MappingProxyType(browser_crashed_error().to_dict())
+_ERR_LOGIN_EXPIRED = MappingProxyType(login_expired_error().to_dict())
+
+
+def _parse_filename_ts(ts: str) -> Optional[datetime]:
+    """解析文件名中的 YYYYMMDD_HHMMSS 时间戳。
+
+    格式固定且已由 _FILENAME_RE 保证为 15 位 ASCII 数字/下划线，直接切片转 int，
+    比 strptime（区域设置感知的通用解析器）快得多。日期非法（如 13 月）时返回 None。
+    """
+    try:
+        return datetime(
+            int(ts[0:4]), int(ts[4:6]), int(ts[6:8]),
+            int(ts[9:11]), int(ts[11:13]), int(ts[13:15]),
+        )
+    except ValueError:
+        return None
+
+
+def _scan_data_dir(dir_path: Path, needle: Optional[str] = None) -> list[os.DirEntry]:
+    """单次 os.scandir 列出目录下的普通文件（按文件名排序）。
+
+    在工作线程中执行；目录不存在时返回空列表。
+    先按扩展名排除非数据文件（如 .gitkeep）；needle 非空时再按整个文件名做一次廉价的
+    子串预过滤（关键词是文件名的一部分，不含 needle 的文件名不可能命中）。
+    被排除的条目既不做正则匹配也不做 is_file 判断。
+    DirEntry.is_file() 在 Linux 上直接使用 readdir 返回的 d_type，不额外 stat；
+    DirEntry.stat() 结果会缓存在条目上，后续只需一次 fstatat。
+    """
+    try:
+        with os.scandir(dir_path) as it:
+            if needle:
+                entries = [
+                    entry for entry in it
+                    if entry.name.endswith(_VALID_SUFFIXES)
+                    and needle in entry.name.casefold()
+                    and entry.is_file()
+                ]
+            else:
+                entries = [
+                    entry for entry in it
+                    if entry.name.endswith(_VALID_SUFFIXES) and entry.is_file()
+                ]
+    except FileNotFoundError:
+        return []
+    entries.sort(key=lambda entry: entry.name)
+    return entries
+
+
+async def _scan_dir(
+    dir_path: Path, needle: Optional[str]
+) -> list[tuple[os.DirEntry, str, datetime]]:
+    """扫描单个数据子目录，按文件名解析并过滤出候选文件（不触发 stat）。
 
     Args:
-        stem: 文件名（不含扩展名）
+        dir_path: 数据子目录路径
+        needle: 已 casefold 的关键词过滤串（None 表示不过滤）
 
     Returns:
-        提取到的关键词字符串
+        (DirEntry, 关键词, 采集时间) 三元组列表，按文件名排序
     """
-    # 去掉 notes_ 前缀（笔记详情文件的命名约定）
-    if stem.startswith("notes_"):
-        stem = stem[6:]
+    entries = await asyncio.to_thread(_scan_data_dir, dir_path, needle)
+    candidates: list[tuple[os.DirEntry, str, datetime]] = []
+    for entry in entries:
+        # 预编译正则一次匹配出关键词和时间戳；不符合命名约定的文件（如 .gitkeep）忽略
+        match = _FILENAME_RE.match(entry.name)
+        if match is None:
+            continue
+
+        extracted_keyword = match["kw"]
+
+        if needle and needle not in extracted_keyword.casefold():
+            continue
+
+        # 创建时间取文件名中的采集时间戳（由 Storage 写入时生成）
+        created_at = _parse_filename_ts(match["ts"])
+        if created_at is None:
+            continue
+
+        candidates.append((entry, extracted_keyword, created_at))
+    return candidates
+
+
+async def _bounded_stat(semaphore: asyncio.Semaphore, entry: os.DirEntry) -> os.stat_result:
+    """在信号量限制下于工作线程中 stat 单个文件。"""
+    async with semaphore:
+        return await asyncio.to_thread(entry.stat)
+
 
-    # 时间戳由两段组成：{YYYYMMDD}_{HHMMSS}，占最后两个 "_" 分隔块
-    parts = stem.rsplit("_", 2)
-    if len(parts) >= 3:
-        return parts[0]
-    return stem
+def _entry_to_record(
+    entry: os.DirEntry, keyword: str, created_at: datetime, stat: os.stat_result
+) -> dict:
+    """构建 get_saved_data 返回的单条文件元数据。"""
+    return {
+        "path": entry.path,
+        "keyword": keyword,
+        "created_at": created_at.isoformat(timespec="seconds"),
+        "size_bytes": stat.st_size,
+    }
 
 
 class CrawlerSession:
@@ -105,6 +205,10 @@ class CrawlerSession:
         self._exit_stack: Optional[contextlib.AsyncExitStack] = None
         self._running: bool = False
         self._lock = asyncio.Lock()
+        # 最近一次健康检查通过的 monotonic 时间戳（0 表示无有效缓存）
+        self._last_health_ok_ts: float = 0.0
+        # "已登录"缓存的过期 monotonic 时间戳（0 表示无有效缓存）
+        self._login_ok_until: float = 0.0
 
     def is_running(self) -> bool:
         """返回浏览器是否已成功启动并运行中。"""
@@ -142,6 +246,8 @@ class CrawlerSession:
             self._exit_stack = None
             self._bm = None
         self._running = False
+        self._last_health_ok_ts = 0.0
+        self._login_ok_until = 0.0
         logger.info("MCP 浏览器会话已关闭")
 
     # ============================================================
@@ -152,24 +258,32 @@ class CrawlerSession:
         """检查浏览器是否仍然存活且可用。
 
         通过 Playwright context.browser.is_connected() 判断浏览器进程是否正常。
+        检查通过后 _HEALTH_CHECK_TTL 秒内直接返回 True，不重复探测；
+        检查失败会清除缓存。
 
         Returns:
             True 表示浏览器健康可用，False 表示不可用
         """
-        if self._bm is None:
+        bm = self._bm
+        if bm is None:
             return False
+        now = time.monotonic()
+        if now - self._last_health_ok_ts < _HEALTH_CHECK_TTL:
+            return True
         try:
-            ctx = self._bm.context
-            if ctx is None:
-                return False
-            return ctx.browser.is_connected()
+            # context / browser 为 Playwright 代理属性，只读取一次并绑定到局部变量
+            browser = getattr(bm.context, "browser", None)
+            healthy = browser is not None and bool(browser.is_connected())
         except Exception:
-            return False
+            healthy = False
+        self._last_health_ok_ts = now if healthy else 0.0
+        return healthy
 
     async def _ensure_browser(self) -> Optional[BrowserManager]:
         """确保浏览器可用，崩溃时尝试自动恢复。
 
         检查浏览器健康状态，不健康时执行一次 stop → start 恢复流程。
+        调用方均已持有 _lock，恢复过程天然串行，无需额外加锁。
 
         Returns:
             BrowserManager 实例（可用时），或 None（恢复失败）
@@ -199,6 +313,8 @@ class CrawlerSession:
         """在已持有锁的情况下检测登录态（内部方法）。
 
         创建临时页面执行登录态检查，确保页面在检查后关闭。
+        此处总是实际探测（空结果正是登录失效的信号，不能用缓存掩盖），
+        探测结果用于刷新或清除"已登录"缓存。
 
         Returns:
             True 表示已登录，False 表示未登录或检查失败
@@ -208,12 +324,18 @@ class CrawlerSession:
         try:
             page = await self._bm.new_page()
             try:
-                return await is_logged_in(page)
+                logged_in = await is_logged_in(page)
             finally:
                 await page.close()
         except Exception as e:
             logger.warning("锁内登录态检测异常：%s", e)
-            return False
+            logged_in = False
+        self._update_login_cache(logged_in)
+        return logged_in
+
+    def _update_login_cache(self, logged_in: bool) -> None:
+        """根据一次登录态探测结果刷新（已登录）或清除（未登录 / 失效）缓存。"""
+        self._login_ok_until = time.monotonic() + _LOGIN_OK_TTL if logged_in else 0.0
 
     @asynccontextmanager
     async def browser_lock(self) -> AsyncGenerator[Optional[BrowserManager], None]:
@@ -247,17 +369,17 @@ class CrawlerSession:
         """
         # 快速路径：浏览器明确未启动时提前返回
         if not self._running:
-            return browser_not_running_error().to_dict()
+            return dict(_ERR_BROWSER_NOT_RUNNING)
 
         async with self._lock:
             # 健康检查 + 自动恢复（释放锁前完成，恢复期间其他请求排队等待）
             bm = await self._ensure_browser()
             if bm is None:
-                return browser_crashed_error().to_dict()
+                return dict(_ERR_BROWSER_CRASHED)
 
             # 二次防护：_ensure_browser 可能在恢复过程中改变 _bm
             if self._bm is None:
-                return browser_crashed_error().to_dict()
+                return dict(_ERR_BROWSER_CRASHED)
 
             results = await src.search.search_notes(
                 self._bm, keyword=keyword, max_count=max_count
@@ -267,7 +389,7 @@ class CrawlerSession:
             if not results:
                 logged_in = await self._check_login_in_lock()
                 if not logged_in:
-                    return login_expired_error().to_dict()
+                    return dict(_ERR_LOGIN_EXPIRED)
 
         return {
             "keyword": keyword,
@@ -292,15 +414,15 @@ class CrawlerSession:
         """
         # 快速路径：浏览器明确未启动时提前返回
         if not self._running:
-            return browser_not_running_error().to_dict()
+            return dict(_ERR_BROWSER_NOT_RUNNING)
 
         async with self._lock:
             bm = await self._ensure_browser()
             if bm is None:
-                return browser_crashed_error().to_dict()
+                return dict(_ERR_BROWSER_CRASHED)
 
             if self._bm is None:
-                return browser_crashed_error().to_dict()
+                return dict(_ERR_BROWSER_CRASHED)
 
             result = await src.note.fetch_single_note(
                 self._bm, note_url=note_url, max_comments=max_comments
@@ -310,7 +432,7 @@ class CrawlerSession:
             if result is None:
                 logged_in = await self._check_login_in_lock()
                 if not logged_in:
-                    return login_expired_error().to_dict()
+                    return dict(_ERR_LOGIN_EXPIRED)
                 return crawl_failed_error("URL 无效或页面无法加载").to_dict()
 
         return result
@@ -330,28 +452,40 @@ class CrawlerSession:
             }
         """
         if not self._running:
-            err = browser_not_running_error()
             return {
                 "logged_in": False,
                 "browser_running": False,
-                "message": err.message,
-                "code": err.code,
+                "message": _ERR_BROWSER_NOT_RUNNING["message"],
+                "code": _ERR_BROWSER_NOT_RUNNING["code"],
+            }
+
+        # 近期已确认登录且浏览器仍存活：直接返回缓存结果，省去一次页面探测
+        # （健康检查本身带 TTL 缓存，开销很小；浏览器崩溃时不能继续报告已登录）
+        if (
+            time.monotonic() < self._login_ok_until
+            and self._bm is not None
+            and await self._is_browser_healthy()
+        ):
+            return {
+                "logged_in": True,
+                "browser_running": True,
+                "message": _LOGGED_IN_MESSAGE,
             }
 
         async with self._lock:
             if self._bm is None:
-                err = browser_not_running_error()
                 return {
                     "logged_in": False,
                     "browser_running": False,
-                    "message": err.message,
-                    "code": err.code,
+                    "message": _ERR_BROWSER_NOT_RUNNING["message"],
+                    "code": _ERR_BROWSER_NOT_RUNNING["code"],
                 }
             page = await self._bm.new_page()
             try:
                 logged_in = await is_logged_in(page)
+                self._update_login_cache(logged_in)
                 if logged_in:
-                    message = "已登录，可正常使用采集功能。"
+                    message = _LOGGED_IN_MESSAGE
                 else:
                     message = (
                         "未登录。请先在终端运行 "
@@ -388,7 +522,7 @@ class CrawlerSession:
         """
         # 快速路径：浏览器明确未启动时提前返回
         if not self._running:
-            return browser_not_running_error().to_dict()
+            return dict(_ERR_BROWSER_NOT_RUNNING)
 
         # 限制 max_notes 到上限，避免单次任务耗时过长
         clamped_max_notes = min(max_notes, _MAX_NOTES_LIMIT)
@@ -396,10 +530,10 @@ class CrawlerSession:
         async with self._lock:
             bm = await self._ensure_browser()
             if bm is None:
-                return browser_crashed_error().to_dict()
+                return dict(_ERR_BROWSER_CRASHED)
 
             if self._bm is None:
-                return browser_crashed_error().to_dict()
+                return dict(_ERR_BROWSER_CRASHED)
 
             # Step 1: 搜索
             search_results = await src.search.search_notes(
@@ -443,6 +577,7 @@ class CrawlerSession:
 
         扫描 data/raw/ 和 data/processed/ 目录，返回文件元数据列表。
         可通过 keyword 参数进行模糊过滤（不区分大小写）。
+        一次性收集 iter_saved_data 的全部批次；文件很多且只需部分结果时改用 iter_saved_data。
 
         Args:
             keyword: 关键词过滤（可选，空值 / None 表示返回所有文件）
@@ -462,32 +597,67 @@ class CrawlerSession:
             }
         """
         files: list[dict] = []
-        # 只识别 raw 和 processed 两个子目录
-        for subdir in ("raw", "processed"):
-            dir_path = data_dir / subdir
-            if not dir_path.exists():
-                continue
-
-            for file_path in sorted(dir_path.iterdir()):
-                if not file_path.is_file():
-                    continue
+        async for batch in self.iter_saved_data(keyword=keyword, data_dir=data_dir):
+            files.extend(batch)
+        return {"files": files}
 
-                # 只处理 JSON 和 xlsx 文件
-                if file_path.suffix not in (".json", ".xlsx"):
-                    continue
+    async def iter_saved_data(
+        self,
+        keyword: Optional[str] = None,
+        data_dir: Path = Path("data"),
+        batch_size: int = 100,
+    ) -> AsyncGenerator[list[dict], None]:
+        """分批流式产出本地已保存的数据文件元数据（不依赖浏览器）。
 
-                extracted_keyword = _extract_keyword_from_stem(file_path.stem)
+        目录枚举与文件名过滤一次完成（纯字符串处理），stat 按批进行：
+        每批最多 batch_size 条，调用方提前 break 时后续批次的 stat 不会执行，
+        内存占用与 batch_size 而非文件总数成正比。
 
-                # keyword 过滤：大小写不敏感的模糊匹配
-                if keyword and keyword.lower() not in extracted_keyword.lower():
-                    continue
+        Args:
+            keyword: 关键词过滤（可选，空值 / None 表示返回所有文件）
+            data_dir: 数据根目录（默认 "data"）
+            batch_size: 每批最多产出的记录数
 
-                stat = file_path.stat()
-                files.append({
-                    "path": str(file_path),
-                    "keyword": extracted_keyword,
-                    "created_at": datetime.fromtimestamp(stat.st_ctime).isoformat(timespec="seconds"),
-                    "size_bytes": stat.st_size,
-                })
+        Yields:
+            文件元数据字典列表（字段同 get_saved_data 的 files 元素），不产出空批次
+        """
+        # keyword 过滤：大小写不敏感的模糊匹配；needle 只折叠一次
+        # （casefold 比 lower 更适合中英混排的 Unicode 比较）
+        needle = keyword.casefold() if keyword else None
+
+        # 第一阶段：scandir 枚举 + 文件名过滤（纯字符串处理，不触发 stat）
+        # 只识别 raw 和 processed 两个子目录；两者并发扫描，耗时取决于较慢的一个而非二者之和。
+        # 单个目录扫描失败（如权限不足）只跳过该目录，不影响另一个目录的结果
+        subdirs = (data_dir / "raw", data_dir / "processed")
+        scanned = await asyncio.gather(
+            *(_scan_dir(subdir, needle) for subdir in subdirs),
+            return_exceptions=True,
+        )
+        candidates: list[tuple[os.DirEntry, str, datetime]] = []
+        for subdir, result in zip(subdirs, scanned):
+            if isinstance(result, Exception):
+                logger.warning("扫描数据目录失败，已跳过：%s（%s）", subdir, result)
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            candidates.extend(result)
+
+        # 第二阶段：逐批对候选文件并发 stat（有界并发），总耗时不再随文件数 × 单次延迟线性增长
+        semaphore = asyncio.Semaphore(_STAT_CONCURRENCY)
+        for offset in range(0, len(candidates), batch_size):
+            batch = candidates[offset:offset + batch_size]
+            stats = await asyncio.gather(
+                *(_bounded_stat(semaphore, entry) for entry, _, _ in batch),
+                return_exceptions=True,
+            )
 
-        return {"files": files}
+            # 枚举后文件被删除等情况：stat 失败的条目直接跳过，不影响其余结果
+            records = [
+                _entry_to_record(entry, extracted_keyword, created_at, stat)
+                for (entry, extracted_keyword, created_at), stat in zip(batch, stats)
+                if not isinstance(stat, BaseException)
+            ]
+            if len(records) < len(batch):
+                logger.debug("%d 个文件读取信息失败，已跳过", len(batch) - len(records))
+            if records:
+                yield records
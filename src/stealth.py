@@ -8,6 +8,7 @@
 
 from __future__ import annotations
 
+from types import MappingProxyType
 from typing import TYPE_CHECKING
 
 from browserforge.fingerprints import Browser, FingerprintGenerator
@@ -23,6 +24,12 @@ _fingerprint_generator = FingerprintGenerator(
     os="macos",
 )
 
+# context 配置中与指纹无关的恒定字段（只读模板），每次生成时展开合并
+_CONST_CONTEXT_OPTIONS = MappingProxyType({
+    "timezone_id": "Asia/Shanghai",
+    "color_scheme": "light",
+})
+
 
 def build_stealth(user_agent: str) -> Stealth:
     """根据指纹 UA 构建 Stealth 实例，覆盖默认的 Win32 平台为 MacIntel。"""
@@ -45,20 +52,15 @@ def generate_context_options() -> dict:
         可直接传入 browser.new_context(**options) 的参数字典。
     """
     fp = _fingerprint_generator.generate()
+    navigator = fp.navigator
+    width, height = fp.screen.width, fp.screen.height
 
     return {
-        "user_agent": fp.navigator.userAgent,
-        "viewport": {
-            "width": fp.screen.width,
-            "height": fp.screen.height,
-        },
-        "screen": {
-            "width": fp.screen.width,
-            "height": fp.screen.height,
-        },
-        "locale": fp.navigator.language or "zh-CN",
-        "timezone_id": "Asia/Shanghai",
-        "color_scheme": "light",
+        **_CONST_CONTEXT_OPTIONS,
+        "user_agent": navigator.userAgent,
+        "viewport": {"width": width, "height": height},
+        "screen": {"width": width, "height": height},
+        "locale": navigator.language or "zh-CN",
         # 返回指纹本身供 Stealth 构建时复用 UA
         "_fingerprint": fp,
     }
@@ -0,0 +1,195 @@
+"""
+流式 xlsx 写出模块
+
+职责：
+  - 不经过 openpyxl / xlsxwriter 的单元格对象层，直接把 Sheet XML 以 UTF-8 字节
+    流式写入 zip（ZIP_DEFLATED），每行只做一次字符串拼接，内存占用与行数无关
+  - 只实现 Storage 需要的最小子集：内联字符串 / 数字 / 布尔单元格、冻结首行、
+    自动筛选、固定列宽
+
+用法：
+    write_xlsx_stream(path, [("搜索结果", fieldnames, rows, widths), ...])
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import zipfile
+from pathlib import Path
+from typing import Iterable, Sequence
+from xml.sax.saxutils import escape, quoteattr
+
+# 每累计多少行向 zip 流写一次（减少 write 调用次数）
+_ROWS_PER_CHUNK = 1000
+
+# XML 1.0 不允许的控制字符（制表符 / 换行 / 回车除外），写出前移除
+_ILLEGAL_XML_CHARS_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_CONTENT_TYPES_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    "</styleSheet>"
+)
+
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    # 冻结首行（滚动时表头始终可见）
+    '<sheetViews><sheetView workbookViewId="0">'
+    '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+    "</sheetView></sheetViews>"
+)
+
+
+def write_xlsx_stream(
+    path: Path,
+    sheets: Iterable[tuple[str, Sequence[str], Iterable[Sequence], Sequence[float]]],
+) -> None:
+    """流式写出多 Sheet 的 xlsx 文件。
+
+    Args:
+        path: 输出文件路径
+        sheets: (Sheet 名, 表头字段, 数据行, 各列列宽) 的序列；
+                数据行为按表头顺序排列的值序列，None 值写为空单元格
+    """
+    sheet_names: list[str] = []
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for index, (title, fieldnames, rows, widths) in enumerate(sheets, start=1):
+            sheet_names.append(title)
+            with zf.open(f"xl/worksheets/sheet{index}.xml", "w") as fh:
+                _write_sheet(fh, fieldnames, rows, widths)
+
+        zf.writestr("[Content_Types].xml", _content_types(len(sheet_names)))
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr("xl/workbook.xml", _workbook(sheet_names))
+        zf.writestr("xl/_rels/workbook.xml.rels", _workbook_rels(len(sheet_names)))
+        zf.writestr("xl/styles.xml", _STYLES)
+
+
+def _write_sheet(
+    fh, fieldnames: Sequence[str], rows: Iterable[Sequence], widths: Sequence[float]
+) -> None:
+    """向 zip 内的 Sheet 条目写出完整 worksheet XML。"""
+    letters = [_column_letter(i) for i in range(1, len(fieldnames) + 1)]
+
+    cols = "".join(
+        f'<col min="{i}" max="{i}" width="{width}" customWidth="1"/>'
+        for i, width in enumerate(widths, start=1)
+    )
+    fh.write(f"{_SHEET_HEAD}<cols>{cols}</cols><sheetData>".encode("utf-8"))
+
+    chunk = [_row_xml(1, letters, fieldnames)]
+    row_num = 1
+    for row_num, row in enumerate(rows, start=2):
+        chunk.append(_row_xml(row_num, letters, row))
+        if len(chunk) >= _ROWS_PER_CHUNK:
+            fh.write("".join(chunk).encode("utf-8"))
+            chunk.clear()
+    if chunk:
+        fh.write("".join(chunk).encode("utf-8"))
+
+    tail = "</sheetData>"
+    # 自动筛选（覆盖所有数据列；无数据行时不设置）
+    if row_num > 1:
+        tail += f'<autoFilter ref="A1:{letters[-1]}{row_num}"/>'
+    fh.write(f"{tail}</worksheet>".encode("utf-8"))
+
+
+def _column_letter(index: int) -> str:
+    """将 1 起始的列号转换为 Excel 列字母（1 → A，27 → AA）。"""
+    letters = ""
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def _row_xml(row_num: int, letters: Sequence[str], values: Sequence) -> str:
+    """生成单行的 <row> XML 片段（显式写出单元格坐标，None 值跳过）。"""
+    cells = []
+    for letter, value in zip(letters, values):
+        if value is None:
+            continue
+        ref = f"{letter}{row_num}"
+        if isinstance(value, bool):
+            cells.append(f'<c r="{ref}" t="b"><v>{int(value)}</v></c>')
+        elif isinstance(value, int) or (isinstance(value, float) and math.isfinite(value)):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        else:
+            text = escape(_ILLEGAL_XML_CHARS_RE.sub("", str(value)))
+            cells.append(
+                f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+            )
+    return f'<row r="{row_num}">{"".join(cells)}</row>'
+
+
+def _content_types(sheet_count: int) -> str:
+    """生成 [Content_Types].xml。"""
+    overrides = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for i in range(1, sheet_count + 1)
+    )
+    return f"{_CONTENT_TYPES_HEAD}{overrides}</Types>"
+
+
+def _workbook(sheet_names: Sequence[str]) -> str:
+    """生成 xl/workbook.xml（含各 Sheet 的名称及关系 ID）。"""
+    sheets = "".join(
+        f'<sheet name={quoteattr(name)} sheetId="{i}" r:id="rId{i}"/>'
+        for i, name in enumerate(sheet_names, start=1)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f"<sheets>{sheets}</sheets></workbook>"
+    )
+
+
+def _workbook_rels(sheet_count: int) -> str:
+    """生成 xl/_rels/workbook.xml.rels（各 Sheet + 样式表）。"""
+    rels = "".join(
+        f'<Relationship Id="rId{i}" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        f'Target="worksheets/sheet{i}.xml"/>'
+        for i in range(1, sheet_count + 1)
+    )
+    rels += (
+        f'<Relationship Id="rId{sheet_count + 1}" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/>'
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f"{rels}</Relationships>"
+    )
@@ -1 +1,121 @@
-"""pytest 公共配置。"""
+"""pytest 公共配置 + 共享 fixtures。
+
+  - 替身工厂以 session 级 fixture 暴露（*_factory），实现位于 tests/helpers.py
+  - CrawlerSession 测试用的 patch fixtures（函数级，每个测试独立还原）
+"""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import pytest_asyncio
+
+import src.note
+import src.search
+import src.session
+from tests.helpers import make_bm, make_comment_el, make_note_page, make_page, make_search_card
+
+
+# ============================================================
+# fixtures
+# ============================================================
+
+
+@pytest.fixture(scope="session")
+def search_card_factory():
+    """搜索结果卡片替身工厂，参数见 make_search_card。"""
+    return make_search_card
+
+
+@pytest.fixture(scope="session")
+def note_page_factory():
+    """笔记详情页替身工厂，参数见 make_note_page。"""
+    return make_note_page
+
+
+@pytest.fixture(scope="session")
+def comment_el_factory():
+    """评论元素替身工厂，参数见 make_comment_el。"""
+    return make_comment_el
+
+
+@pytest.fixture(scope="session")
+def page_factory():
+    """搜索页 Page 替身工厂，参数见 make_page。"""
+    return make_page
+
+
+@pytest.fixture(scope="session")
+def bm_factory():
+    """BrowserManager 替身工厂，参数见 make_bm。"""
+    return make_bm
+
+
+# ---- CrawlerSession 测试用 patch fixtures（函数级：每个测试独立还原被替换的属性） ----
+# 模块属性替换走 monkeypatch.setattr（直接 getattr / setattr，撤销记录在普通列表中），
+# 不经过 unittest.mock.patch 的点分路径解析
+
+
+@pytest.fixture
+def mock_browser_manager():
+    """替换 src.session.BrowserManager，yield (mock_bm, MockBM)。
+
+    mock_bm 已接好 async with 协议（__aenter__ 返回自身），
+    MockBM 为被替换的类，可断言实例化次数。
+    """
+    mock_bm = AsyncMock()
+    # AsyncMock 自带 __aenter__ / __aexit__；只需让 __aenter__ 返回自身
+    mock_bm.__aenter__.return_value = mock_bm
+    MockBM = MagicMock(return_value=mock_bm)
+    # patch.object 直接替换模块属性并传入预构建的替身，跳过点分路径解析与默认 MagicMock 构造
+    with patch.object(src.session, "BrowserManager", MockBM):
+        yield mock_bm, MockBM
+
+
+@pytest_asyncio.fixture(loop_scope="module")
+async def started_session(mock_browser_manager):
+    """已 start() 的 CrawlerSession（BrowserManager 已替换），测试结束时 stop() 释放资源。
+
+    事件循环为模块级，仅供标记了 pytest.mark.asyncio(loop_scope="module") 的测试模块使用。
+    """
+    session = src.session.CrawlerSession()
+    await session.start()
+    yield session
+    await session.stop()
+
+
+@pytest.fixture
+def patched_is_logged_in(monkeypatch):
+    """工厂：patched_is_logged_in(value) 将 src.session.is_logged_in 替换为返回 value 的 AsyncMock。"""
+
+    def _patch(value):
+        mock = AsyncMock(return_value=value)
+        monkeypatch.setattr(src.session, "is_logged_in", mock)
+        return mock
+
+    return _patch
+
+
+@pytest.fixture
+def patched_search(monkeypatch):
+    """工厂：patched_search(**mock_kwargs) 替换 src.search.search_notes，返回替换后的 AsyncMock。"""
+
+    def _patch(**mock_kwargs):
+        mock = AsyncMock(**mock_kwargs)
+        monkeypatch.setattr(src.search, "search_notes", mock)
+        return mock
+
+    return _patch
+
+
+@pytest.fixture
+def patched_fetch_single_note(monkeypatch):
+    """工厂：patched_fetch_single_note(**mock_kwargs) 替换 src.note.fetch_single_note，返回替换后的 AsyncMock。"""
+
+    def _patch(**mock_kwargs):
+        mock = AsyncMock(**mock_kwargs)
+        monkeypatch.setattr(src.note, "fetch_single_note", mock)
+        return mock
+
+    return _patch
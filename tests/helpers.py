@@ -0,0 +1,398 @@
+"""测试共享替身（普通模块，供各测试文件直接导入；fixture 统一放在 conftest.py）。
+
+提供 Playwright ElementHandle / Page / BrowserManager 的轻量替身：
+  - SimpleNamespace + 模块级异步可调用类（无嵌套闭包，可 pickle），
+    不经过 AsyncMock 的调用记录机制
+  - 细粒度构件（AsyncReturn / make_text_el 等）与替身工厂（make_page 等）
+  - 通用断言辅助（assert_error_dict）
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Awaitable, Callable, Optional
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+# 模拟 Page 允许的属性集合：spec_set 约束后不会按需自动生成子 mock
+PAGE_SPEC = [
+    "goto",
+    "query_selector",
+    "query_selector_all",
+    "wait_for_selector",
+    "mouse",
+    "close",
+]
+
+# 共享异常实例：错误路径测试直接复用，避免每次调用重新构造；
+# 抛出时先清空 __traceback__，否则同一实例每次重新抛出都会累积上一次的栈帧
+TIMEOUT_EXC = PlaywrightTimeoutError("timeout")
+NETWORK_EXC = Exception("network error")
+DOM_EXC = Exception("DOM error")
+PARSE_EXC = Exception("parse error")
+
+
+class AsyncReturn:
+    """返回固定值的异步可调用对象（替代 AsyncMock(return_value=...)，免去 mock 簿记开销）。"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value) -> None:
+        self.value = value
+
+    async def __call__(self, *_args, **_kwargs):
+        return self.value
+
+
+class ImgAttr:
+    """模拟 <img>.get_attribute：仅 data-src 返回给定 URL，其余属性返回 None。"""
+
+    __slots__ = ("src",)
+
+    def __init__(self, src: str) -> None:
+        self.src = src
+
+    async def __call__(self, name: str):
+        return self.src if name == "data-src" else None
+
+
+class ImgAttrSrcOnly(ImgAttr):
+    """模拟仅有 src（无 data-src）的 <img>.get_attribute。"""
+
+    __slots__ = ()
+
+    async def __call__(self, name: str):
+        return self.src if name == "src" else None
+
+
+class AsyncRaise:
+    """调用即抛出给定异常的异步可调用对象（抛出前清空异常实例上残留的 traceback）。"""
+
+    __slots__ = ("exc",)
+
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+
+    async def __call__(self, *_args, **_kwargs):
+        raise self.exc.with_traceback(None)
+
+
+class CallCounter:
+    """记录调用次数的异步 no-op（替代仅用于 assert_called 的 AsyncMock）。"""
+
+    __slots__ = ("calls",)
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def __call__(self, *_args, **_kwargs):
+        self.calls += 1
+
+
+class QuerySelectorAll:
+    """模拟 page.query_selector_all：按选择器查表，未命中返回共享的空元组。"""
+
+    __slots__ = ("results",)
+
+    def __init__(self, results: dict) -> None:
+        self.results = results
+
+    async def __call__(self, sel: str, **_kwargs):
+        return self.results.get(sel, ())
+
+
+class WaitForSelector:
+    """模拟 page.wait_for_selector：选择器无匹配元素时抛出共享的 TIMEOUT_EXC。"""
+
+    __slots__ = ("results",)
+
+    def __init__(self, results: dict) -> None:
+        self.results = results
+
+    async def __call__(self, sel: str, **_kwargs):
+        if not self.results.get(sel):
+            raise TIMEOUT_EXC.with_traceback(None)
+
+
+# ---- 模拟元素的 query_selector 分发表 ----
+# *_EXACT：选择器精确匹配 → 元素键；*_CONTAINS：选择器子串 → 元素键（高频字段在前）
+
+_SEARCH_CARD_EXACT = {
+    "a.cover": "cover",
+    "a.cover img": "img",
+}
+
+_SEARCH_CARD_CONTAINS = (
+    (".footer a.title", "title"),
+    (".card-bottom-wrapper .author .name", "author"),
+    ("a.author[href*='/user/profile/']", "user"),
+    (".name-time-wrapper .time", "time"),
+    (".like-wrapper .count", "like"),
+    ('a[href*="/explore/"]', "explore"),
+    ("video-icon", "video"),
+    ("type-video", "video"),
+    ("play-icon", "video"),
+)
+
+_NOTE_PAGE_EXACT = {
+    "#detail-title": "title",
+    "#detail-desc .note-text": "content",
+    ".author-container .username": "author",
+    ".note-content .bottom-container .date": "time",
+}
+
+_NOTE_PAGE_CONTAINS = (
+    (".like-wrapper .count", "likes"),
+    (".collect-wrapper .count", "collects"),
+    (".chat-wrapper .count", "comments"),
+    (".share-wrapper .count", "shares"),
+    (".author-container a[href*='/user/profile/']", "author_link"),
+)
+
+_COMMENT_EL_EXACT = {
+    ".right .info .date": "date",
+}
+
+_COMMENT_EL_CONTAINS = (
+    (".right .author-wrapper .author a.name", "user_name"),
+    (".right .author-wrapper a[href*='/user/profile/']", "user_link"),
+    (".right .content .note-text", "content"),
+    (".right .info .interactions .like", "like"),
+    (".right .info .date .location", "location"),
+)
+
+
+class QuerySelector:
+    """根据分发表模拟 query_selector：先精确匹配，再按子串匹配，未命中返回 None。"""
+
+    __slots__ = ("table", "exact", "contains")
+
+    def __init__(
+        self,
+        table: dict,
+        exact: dict[str, str],
+        contains: tuple[tuple[str, str], ...],
+    ) -> None:
+        self.table = table
+        self.exact = exact
+        self.contains = contains
+
+    async def __call__(self, sel: str):
+        key = self.exact.get(sel)
+        if key is None:
+            for sub, candidate in self.contains:
+                if sub in sel:
+                    key = candidate
+                    break
+        return self.table.get(key)
+
+
+# ============================================================
+# 搜索卡片 / 笔记详情页 / 评论元素（parser 测试）
+# ============================================================
+
+
+def make_text_el(text: str) -> SimpleNamespace:
+    """创建带固定文本的模拟元素。"""
+    return SimpleNamespace(inner_text=AsyncReturn(text))
+
+
+def make_attr_el(attr_value: str) -> SimpleNamespace:
+    """创建 get_attribute 返回固定值的模拟元素。"""
+    return SimpleNamespace(get_attribute=AsyncReturn(attr_value))
+
+
+@lru_cache(maxsize=256)
+def _int_text_el(n: int) -> SimpleNamespace:
+    """返回 inner_text 为 str(n) 的元素（按整数缓存，跨测试复用；替身无调用记录，可安全共享）。"""
+    return make_text_el(str(n))
+
+
+@lru_cache(maxsize=128)
+def _img_stub(src: str) -> SimpleNamespace:
+    """返回 data-src 为 src 的 <img> 替身（按 URL 缓存，跨测试复用）。"""
+    return SimpleNamespace(get_attribute=ImgAttr(src))
+
+
+def make_search_card(
+    explore_href: str = "/explore/abc123",
+    cover_href: str = "/search_result/abc123?xsec_token=TOKEN123&xsec_source=pc_search",
+    img_data_src: str = "https://example.com/cover.jpg",
+    title: str = "测试标题",
+    author: str = "测试作者",
+    user_href: str = "/user/profile/user001?x=1",
+    publish_time: str = "2025-01-15",
+    likes_text: str = "1.2万",
+    is_video: bool = False,
+    has_explore_anchor: bool = True,
+    img_get_attr: Optional[Callable[[str], Awaitable[Optional[str]]]] = None,
+) -> SimpleNamespace:
+    """创建可配置的模拟搜索结果卡片 ElementHandle。
+
+    img_get_attr 可覆盖封面 <img> 的 get_attribute 行为（默认仅 data-src 返回 img_data_src）。
+    """
+    explore_anchor = make_attr_el(explore_href) if has_explore_anchor else None
+    cover_anchor = make_attr_el(cover_href)
+
+    img_el = SimpleNamespace(get_attribute=img_get_attr or ImgAttr(img_data_src))
+
+    title_el = make_text_el(title)
+    author_el = make_text_el(author)
+    user_anchor = make_attr_el(user_href)
+    time_el = make_text_el(publish_time)
+    like_el = make_text_el(likes_text)
+    video_el = SimpleNamespace() if is_video else None
+
+    table = {
+        "explore": explore_anchor,
+        "cover": cover_anchor,
+        "img": img_el,
+        "title": title_el,
+        "author": author_el,
+        "user": user_anchor,
+        "time": time_el,
+        "like": like_el,
+        "video": video_el,
+    }
+
+    return SimpleNamespace(
+        query_selector=QuerySelector(table, _SEARCH_CARD_EXACT, _SEARCH_CARD_CONTAINS)
+    )
+
+
+def make_note_page(
+    title: str = "笔记标题",
+    content: str = "笔记正文内容",
+    author: str = "作者昵称",
+    author_id: str = "user001",
+    publish_time: str = "2025-01-15",
+    likes: int = 1200,
+    collects: int = 300,
+    comments_count: int = 50,
+    shares: int = 10,
+    tags: list[str] | None = None,
+    images: list[str] | None = None,
+) -> SimpleNamespace:
+    """创建模拟笔记详情页 Page。"""
+    tags = tags or ["#Python", "#教程"]
+    images = images or ["https://example.com/img1.jpg"]
+
+    title_el = make_text_el(title)
+    content_el = make_text_el(content)
+    author_el = make_text_el(author)
+    time_el = make_text_el(publish_time)
+    likes_el = _int_text_el(likes)
+    collects_el = _int_text_el(collects)
+    comments_el = _int_text_el(comments_count)
+    shares_el = _int_text_el(shares)
+
+    author_link = SimpleNamespace(get_attribute=AsyncReturn(f"/user/profile/{author_id}?x=1"))
+
+    table = {
+        "title": title_el,
+        "content": content_el,
+        "author": author_el,
+        "time": time_el,
+        "author_link": author_link,
+        "likes": likes_el,
+        "collects": collects_el,
+        "comments": comments_el,
+        "shares": shares_el,
+    }
+
+    # 图片 mock
+    img_els = [_img_stub(src) for src in images]
+
+    qsa_results = {
+        "#detail-desc a.tag": [make_text_el(tag) for tag in tags],
+        ".swiper-slide img": img_els,
+    }
+
+    return SimpleNamespace(
+        query_selector=QuerySelector(table, _NOTE_PAGE_EXACT, _NOTE_PAGE_CONTAINS),
+        query_selector_all=QuerySelectorAll(qsa_results),
+    )
+
+
+def make_comment_el(
+    comment_id: str = "comment-abc123",
+    user_name: str = "评论用户",
+    user_id: str = "usr001",
+    content: str = "测试评论内容",
+    likes_text: str = "10",
+    time_date: str = "01-15",
+    ip_location: str = "广东",
+    no_location: bool = False,
+) -> SimpleNamespace:
+    """创建模拟评论 ElementHandle。"""
+    user_name_el = make_text_el(user_name)
+    user_link = SimpleNamespace(get_attribute=AsyncReturn(f"/user/profile/{user_id}?x=1"))
+    content_el = make_text_el(content)
+    like_el = make_text_el(likes_text)
+    loc_el = make_text_el(ip_location) if not no_location else None
+    # date 包含时间 + 属地（如果有）
+    full_date = f"{time_date}{ip_location}" if ip_location and not no_location else time_date
+    date_el = make_text_el(full_date)
+
+    table = {
+        "user_name": user_name_el,
+        "user_link": user_link,
+        "content": content_el,
+        "like": like_el,
+        "location": loc_el,
+        "date": date_el,
+    }
+
+    return SimpleNamespace(
+        get_attribute=AsyncReturn(comment_id),
+        query_selector=QuerySelector(table, _COMMENT_EL_EXACT, _COMMENT_EL_CONTAINS),
+    )
+
+
+# ============================================================
+# Page / BrowserManager（search 测试）
+# ============================================================
+
+
+def make_page(
+    qsa_results: dict | None = None,
+    goto_raises: Exception | None = None,
+) -> SimpleNamespace:
+    """创建通用模拟 Page（SimpleNamespace + 异步可调用对象，无 mock 调用记录开销）。
+
+    调用痕迹通过 CallCounter 暴露：
+      - page.mouse.wheel.calls：mouse.wheel() 被调用的次数
+      - page.close.calls：close() 被调用的次数
+
+    Args:
+        qsa_results: sel → [element, ...] 的映射
+        goto_raises: 若设置，goto() 会抛出该异常
+    """
+    qsa_results = qsa_results or {}
+    return SimpleNamespace(
+        goto=AsyncRaise(goto_raises) if goto_raises else AsyncReturn(None),
+        query_selector_all=QuerySelectorAll(qsa_results),
+        wait_for_selector=WaitForSelector(qsa_results),
+        mouse=SimpleNamespace(wheel=CallCounter()),
+        close=CallCounter(),
+    )
+
+
+def make_bm(page=None) -> SimpleNamespace:
+    """创建模拟 BrowserManager，new_page() 返回指定的 page 替身。"""
+    return SimpleNamespace(new_page=AsyncReturn(page if page is not None else make_page()))
+
+
+# ============================================================
+# CrawlerSession 错误结构断言（session 测试）
+# ============================================================
+
+
+def assert_error_dict(result, *, code: Optional[str] = None) -> None:
+    """断言 result 为统一错误结构：error=True + 字符串 message（可选校验 code）。"""
+    assert isinstance(result, dict)
+    assert result.get("error") is True
+    assert isinstance(result.get("message"), str)
+    if code is not None:
+        assert result.get("code") == code
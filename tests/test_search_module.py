@@ -2,64 +2,49 @@
 search 模块单元测试
 
 测试策略：
-  - BrowserManager 使用 AsyncMock 模拟，不依赖真实浏览器
-  - asyncio.sleep 打补丁为 no-op，避免测试延迟
+  - BrowserManager / Page 使用 SimpleNamespace 替身（绑定异步函数）模拟，不依赖真实浏览器
+  - asyncio.sleep 由 autouse fixture 替换为 no-op，避免测试延迟
   - parse_search_card 打补丁隔离 parser 依赖
   - 覆盖：search_notes、_detect_card_selector、_scroll_to_load
 """
 
 from __future__ import annotations
 
+import itertools
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
 from src.search import _detect_card_selector, _scroll_to_load, search_notes
+from tests.helpers import DOM_EXC, NETWORK_EXC, PAGE_SPEC, TIMEOUT_EXC, AsyncRaise
 
+# 卡片占位对象（共享不可变元组，按需切片）：
+# _scroll_to_load 只统计数量，parse_search_card 在相关测试中被打补丁，不会解引用卡片元素
+_STUBS = tuple(object() for _ in range(32))
 
-# ============================================================
-# 辅助函数
-# ============================================================
+# 逐轮 query_selector_all 返回值：第二轮有增长，之后停滞
+_STUB_LISTS = ((), _STUBS[:3], _STUBS[:3], _STUBS[:3])
+
+
+@pytest.fixture
+def basic_page(page_factory):
+    """search_notes 用的搜索页替身构建函数：首选选择器命中 cards，可选 goto() 抛出 goto_exc。"""
+
+    def _build(*, cards: tuple = (), goto_exc: Exception | None = None):
+        return page_factory({"section.note-item": cards} if cards else None, goto_exc)
+
+    return _build
 
 
-def _make_bm(page: AsyncMock | None = None) -> AsyncMock:
-    """创建模拟 BrowserManager，new_page() 返回指定的 page mock。"""
-    bm = AsyncMock()
-    bm.new_page = AsyncMock(return_value=page or AsyncMock())
-    return bm
-
-
-def _make_page(
-    qsa_results: dict | None = None,
-    goto_raises: Exception | None = None,
-) -> AsyncMock:
-    """创建通用模拟 Page。
-
-    Args:
-        qsa_results: sel → [element, ...] 的映射
-        goto_raises: 若设置，goto() 会抛出该异常
-    """
-    page = AsyncMock()
-    qsa_results = qsa_results or {}
-
-    if goto_raises:
-        page.goto = AsyncMock(side_effect=goto_raises)
-    else:
-        page.goto = AsyncMock(return_value=None)
-
-    page.query_selector_all = AsyncMock(
-        side_effect=lambda sel: qsa_results.get(sel, [])
-    )
-    page.wait_for_selector = AsyncMock(
-        side_effect=lambda sel, **kw: (_ for _ in ()).throw(PlaywrightTimeoutError("timeout"))
-        if not qsa_results.get(sel)
-        else None
-    )
-    page.mouse = AsyncMock()
-    page.mouse.wheel = AsyncMock()
-    page.close = AsyncMock()
-    return page
+@pytest.fixture(autouse=True)
+def _fast_sleep(monkeypatch):
+    """将 asyncio.sleep 替换为无等待的 no-op（monkeypatch 直接 setattr，无 mock 构造开销）。"""
+
+    async def _noop(*_args, **_kwargs):
+        return None
+
+    monkeypatch.setattr("asyncio.sleep", _noop)
 
 
 # ============================================================
@@ -73,7 +58,7 @@ class TestDetectCardSelector:
     async def test_returns_selector_with_elements(self):
         """有元素的选择器应被返回。"""
         el = AsyncMock()
-        page = AsyncMock()
+        page = AsyncMock(spec_set=PAGE_SPEC)
         page.wait_for_selector = AsyncMock(return_value=None)
         page.query_selector_all = AsyncMock(return_value=[el])
 
@@ -81,12 +66,10 @@ class TestDetectCardSelector:
 
         assert result is not None
 
-    async def test_returns_none_when_all_timeout(self):
+    async def test_returns_none_when_all_timeout(self, page_factory):
         """所有选择器超时时应返回 None。"""
-        page = AsyncMock()
-        page.wait_for_selector = AsyncMock(
-            side_effect=PlaywrightTimeoutError("timeout")
-        )
+        # 无任何匹配元素：wait_for_selector 对每个候选选择器抛出 TIMEOUT_EXC
+        page = page_factory()
 
         result = await _detect_card_selector(page)
 
@@ -94,8 +77,7 @@ class TestDetectCardSelector:
 
     async def test_returns_none_on_exception(self):
         """选择器抛出异常时应继续尝试并最终返回 None。"""
-        page = AsyncMock()
-        page.wait_for_selector = AsyncMock(side_effect=Exception("unexpected"))
+        page = SimpleNamespace(wait_for_selector=AsyncRaise(DOM_EXC))
 
         result = await _detect_card_selector(page)
 
@@ -111,7 +93,7 @@ class TestDetectCardSelector:
             call_count += 1
             return [] if call_count == 1 else [el]
 
-        page = AsyncMock()
+        page = AsyncMock(spec_set=PAGE_SPEC)
         page.wait_for_selector = AsyncMock(return_value=None)
         page.query_selector_all = AsyncMock(side_effect=qsa)
 
@@ -129,68 +111,54 @@ class TestDetectCardSelector:
 class TestScrollToLoad:
     """测试瀑布流加载滚动逻辑。"""
 
-    async def test_stops_immediately_when_count_met(self):
+    async def test_stops_immediately_when_count_met(self, page_factory):
         """当前卡片数已达目标时不执行滚动。"""
-        page = AsyncMock()
-        page.query_selector_all = AsyncMock(return_value=[AsyncMock()] * 5)
-        page.mouse = AsyncMock()
-        page.mouse.wheel = AsyncMock()
-
-        with patch("asyncio.sleep", new=AsyncMock()):
-            await _scroll_to_load(
-                page,
-                card_selector="section.note-item",
-                target_count=3,
-                scroll_pause=0.0,
-                scroll_interval=(0.0, 0.0),
-            )
+        page = page_factory({"section.note-item": _STUBS[:5]})
+
+        await _scroll_to_load(
+            page,
+            card_selector="section.note-item",
+            target_count=3,
+            scroll_pause=0.0,
+            scroll_interval=(0.0, 0.0),
+        )
 
-        page.mouse.wheel.assert_not_called()
+        assert page.mouse.wheel.calls == 0
 
-    async def test_stops_after_stale_rounds(self):
+    async def test_stops_after_stale_rounds(self, page_factory):
         """连续无新增卡片达到阈值时停止。"""
-        page = AsyncMock()
-        page.query_selector_all = AsyncMock(return_value=[])
-        page.mouse = AsyncMock()
-        page.mouse.wheel = AsyncMock()
-
-        with patch("asyncio.sleep", new=AsyncMock()):
-            await _scroll_to_load(
-                page,
-                card_selector="section.note-item",
-                target_count=20,
-                scroll_pause=0.0,
-                scroll_interval=(0.0, 0.0),
-            )
+        page = page_factory()
+
+        await _scroll_to_load(
+            page,
+            card_selector="section.note-item",
+            target_count=20,
+            scroll_pause=0.0,
+            scroll_interval=(0.0, 0.0),
+        )
 
-        assert page.mouse.wheel.call_count >= 1
+        assert page.mouse.wheel.calls >= 1
 
-    async def test_resets_stale_count_when_new_cards_appear(self):
+    async def test_resets_stale_count_when_new_cards_appear(self, page_factory):
         """出现新卡片时 stale_rounds 应重置。"""
-        counts = [0, 3, 3, 3]  # 第二轮有增长，之后停滞
-        call_idx = 0
+        # 依次返回预构建的列表，耗尽后重复最后一轮
+        responses = itertools.chain(_STUB_LISTS, itertools.repeat(_STUB_LISTS[-1]))
 
         async def qsa(sel):
-            nonlocal call_idx
-            val = counts[min(call_idx, len(counts) - 1)]
-            call_idx += 1
-            return [AsyncMock()] * val
+            return next(responses)
 
-        page = AsyncMock()
-        page.query_selector_all = AsyncMock(side_effect=qsa)
-        page.mouse = AsyncMock()
-        page.mouse.wheel = AsyncMock()
-
-        with patch("asyncio.sleep", new=AsyncMock()):
-            await _scroll_to_load(
-                page,
-                card_selector="section.note-item",
-                target_count=20,
-                scroll_pause=0.0,
-                scroll_interval=(0.0, 0.0),
-            )
+        page = page_factory()
+        page.query_selector_all = qsa
+
+        await _scroll_to_load(
+            page,
+            card_selector="section.note-item",
+            target_count=20,
+            scroll_pause=0.0,
+            scroll_interval=(0.0, 0.0),
+        )
 
-        assert page.mouse.wheel.call_count >= 1
+        assert page.mouse.wheel.calls >= 1
 
 
 # ============================================================
@@ -201,47 +169,27 @@ class TestScrollToLoad:
 class TestSearchNotes:
     """测试 search_notes 公共接口。"""
 
-    async def test_returns_empty_when_no_selector_found(self):
+    async def test_returns_empty_when_no_selector_found(self, bm_factory, basic_page):
         """找不到卡片选择器时应返回空列表。"""
-        page = AsyncMock()
-        page.goto = AsyncMock()
-        page.wait_for_selector = AsyncMock(
-            side_effect=PlaywrightTimeoutError("timeout")
+        bm = bm_factory(basic_page())
+
+        result = await search_notes(
+            bm,
+            keyword="Python",
+            max_count=5,
+            scroll_pause=0.0,
+            scroll_interval=(0.0, 0.0),
         )
-        page.close = AsyncMock()
-
-        bm = _make_bm(page)
-
-        with patch("asyncio.sleep", new=AsyncMock()):
-            result = await search_notes(
-                bm,
-                keyword="Python",
-                max_count=5,
-                scroll_pause=0.0,
-                scroll_interval=(0.0, 0.0),
-            )
 
         assert result == []
 
-    async def test_returns_parsed_cards(self):
+    async def test_returns_parsed_cards(self, bm_factory, basic_page):
         """找到卡片并成功解析时应返回结果列表。"""
-        el = AsyncMock()
-        page = AsyncMock()
-        page.goto = AsyncMock()
-        page.wait_for_selector = AsyncMock(return_value=None)
-        page.query_selector_all = AsyncMock(return_value=[el, el])
-        page.mouse = AsyncMock()
-        page.mouse.wheel = AsyncMock()
-        page.close = AsyncMock()
-
-        bm = _make_bm(page)
+        bm = bm_factory(basic_page(cards=_STUBS[:2]))
 
         mock_card = {"note_id": "n1", "title": "测试"}
 
-        with (
-            patch("src.search.parse_search_card", return_value=mock_card),
-            patch("asyncio.sleep", new=AsyncMock()),
-        ):
+        with patch("src.search.parse_search_card", return_value=mock_card):
             result = await search_notes(
                 bm,
                 keyword="Python",
@@ -252,23 +200,11 @@ class TestSearchNotes:
 
         assert len(result) == 2
 
-    async def test_skips_failed_cards(self):
+    async def test_skips_failed_cards(self, bm_factory, basic_page):
         """parse_search_card 返回 None 的卡片应被跳过。"""
-        el = AsyncMock()
-        page = AsyncMock()
-        page.goto = AsyncMock()
-        page.wait_for_selector = AsyncMock(return_value=None)
-        page.query_selector_all = AsyncMock(return_value=[el])
-        page.mouse = AsyncMock()
-        page.mouse.wheel = AsyncMock()
-        page.close = AsyncMock()
-
-        bm = _make_bm(page)
+        bm = bm_factory(basic_page(cards=_STUBS[:1]))
 
-        with (
-            patch("src.search.parse_search_card", return_value=None),
-            patch("asyncio.sleep", new=AsyncMock()),
-        ):
+        with patch("src.search.parse_search_card", return_value=None):
             result = await search_notes(
                 bm,
                 keyword="Python",
@@ -279,61 +215,37 @@ class TestSearchNotes:
 
         assert result == []
 
-    async def test_returns_empty_on_timeout(self):
+    async def test_returns_empty_on_timeout(self, bm_factory, basic_page):
         """页面加载超时时应返回空列表。"""
-        page = AsyncMock()
-        page.goto = AsyncMock(side_effect=PlaywrightTimeoutError("timeout"))
-        page.close = AsyncMock()
-
-        bm = _make_bm(page)
+        bm = bm_factory(basic_page(goto_exc=TIMEOUT_EXC))
 
         result = await search_notes(bm, keyword="Python", max_count=5)
 
         assert result == []
 
-    async def test_returns_empty_on_general_exception(self):
+    async def test_returns_empty_on_general_exception(self, bm_factory, basic_page):
         """其他异常时应返回空列表。"""
-        page = AsyncMock()
-        page.goto = AsyncMock(side_effect=Exception("network error"))
-        page.close = AsyncMock()
-
-        bm = _make_bm(page)
+        bm = bm_factory(basic_page(goto_exc=NETWORK_EXC))
 
         result = await search_notes(bm, keyword="Python", max_count=5)
 
         assert result == []
 
-    async def test_closes_page_even_on_error(self):
+    async def test_closes_page_even_on_error(self, bm_factory, basic_page):
         """无论成功或失败，page.close() 都应被调用。"""
-        page = AsyncMock()
-        page.goto = AsyncMock(side_effect=Exception("error"))
-        page.close = AsyncMock()
-
-        bm = _make_bm(page)
+        page = basic_page(goto_exc=NETWORK_EXC)
 
-        await search_notes(bm, keyword="Python", max_count=5)
+        await search_notes(bm_factory(page), keyword="Python", max_count=5)
 
-        page.close.assert_called_once()
+        assert page.close.calls == 1
 
-    async def test_respects_max_count(self):
+    async def test_respects_max_count(self, bm_factory, basic_page):
         """最多返回 max_count 条结果。"""
-        els = [AsyncMock() for _ in range(10)]
-        page = AsyncMock()
-        page.goto = AsyncMock()
-        page.wait_for_selector = AsyncMock(return_value=None)
-        page.query_selector_all = AsyncMock(return_value=els)
-        page.mouse = AsyncMock()
-        page.mouse.wheel = AsyncMock()
-        page.close = AsyncMock()
-
-        bm = _make_bm(page)
+        bm = bm_factory(basic_page(cards=_STUBS[:10]))
 
         mock_card = {"note_id": "n1", "title": "测试"}
 
-        with (
-            patch("src.search.parse_search_card", return_value=mock_card),
-            patch("asyncio.sleep", new=AsyncMock()),
-        ):
+        with patch("src.search.parse_search_card", return_value=mock_card):
             result = await search_notes(
                 bm,
                 keyword="Python",
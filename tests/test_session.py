@@ -2,21 +2,26 @@
 CrawlerSession 单元测试
 
 测试策略：
-  - BrowserManager 全部 mock，不依赖真实浏览器
-  - is_logged_in 函数 mock，隔离网络调用
+  - BrowserManager 全部 mock（conftest.mock_browser_manager），不依赖真实浏览器
+  - is_logged_in 函数 mock（conftest.patched_is_logged_in），隔离网络调用
   - 覆盖：初始状态、生命周期、并发锁、登录态检查
 """
 
 from __future__ import annotations
 
 import asyncio
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
 # 以下导入在 src/session.py 实现之前会失败（RED 状态预期）
 from src.session import CrawlerSession
 
+# 异步测试类显式标记为 asyncio 测试（不依赖 asyncio_mode=auto 的运行期探测），
+# 并共享同一个模块级事件循环，避免逐测试创建 / 销毁循环；
+# TestCrawlerSessionInitialState 为同步测试，不加标记
+_asyncio_module_loop = pytest.mark.asyncio(loop_scope="module")
+
 
 class TestCrawlerSessionInitialState:
     """测试初始状态（未启动浏览器）。"""
@@ -37,35 +42,19 @@ class TestCrawlerSessionInitialState:
         assert session._headless is False
 
 
+@_asyncio_module_loop
 class TestCrawlerSessionLifecycle:
     """测试浏览器生命周期管理。"""
 
-    async def test_start_sets_running(self):
+    async def test_start_sets_running(self, started_session):
         """start() 成功后 is_running() 应为 True。"""
-        with patch("src.session.BrowserManager") as MockBM:
-            mock_bm = AsyncMock()
-            MockBM.return_value = mock_bm
-            mock_bm.__aenter__ = AsyncMock(return_value=mock_bm)
-            mock_bm.__aexit__ = AsyncMock(return_value=None)
-
-            session = CrawlerSession()
-            await session.start()
-
-            assert session.is_running() is True
+        assert started_session.is_running() is True
 
-    async def test_stop_clears_running(self):
+    async def test_stop_clears_running(self, started_session):
         """stop() 后 is_running() 应为 False。"""
-        with patch("src.session.BrowserManager") as MockBM:
-            mock_bm = AsyncMock()
-            MockBM.return_value = mock_bm
-            mock_bm.__aenter__ = AsyncMock(return_value=mock_bm)
-            mock_bm.__aexit__ = AsyncMock(return_value=None)
+        await started_session.stop()
 
-            session = CrawlerSession()
-            await session.start()
-            await session.stop()
-
-            assert session.is_running() is False
+        assert started_session.is_running() is False
 
     async def test_stop_when_not_running_is_safe(self):
         """未启动时调用 stop() 不应抛出异常。"""
@@ -73,82 +62,70 @@ class TestCrawlerSessionLifecycle:
         await session.stop()  # 不应抛出
         assert session.is_running() is False
 
-    async def test_double_start_is_idempotent(self):
+    async def test_double_start_is_idempotent(self, mock_browser_manager, started_session):
         """重复调用 start() 不应重复创建浏览器实例。"""
-        with patch("src.session.BrowserManager") as MockBM:
-            mock_bm = AsyncMock()
-            MockBM.return_value = mock_bm
-            mock_bm.__aenter__ = AsyncMock(return_value=mock_bm)
-            mock_bm.__aexit__ = AsyncMock(return_value=None)
+        _, MockBM = mock_browser_manager
 
-            session = CrawlerSession()
-            await session.start()
-            await session.start()  # 第二次调用应幂等
+        await started_session.start()  # 第二次调用应幂等
 
-            # BrowserManager 只应被实例化一次
-            assert MockBM.call_count == 1
+        # BrowserManager 只应被实例化一次
+        assert MockBM.call_count == 1
 
-    async def test_stop_cleans_up_resources(self):
+    async def test_stop_cleans_up_resources(self, started_session):
         """stop() 应正确关闭 BrowserManager 并清理所有内部状态。
 
         AsyncExitStack.aclose() 通过 type(cm).__aexit__ 触发清理，
         验证 stop() 后 _bm 和 _exit_stack 均已置空。
         """
-        with patch("src.session.BrowserManager") as MockBM:
-            mock_bm = AsyncMock()
-            MockBM.return_value = mock_bm
-            mock_bm.__aenter__ = AsyncMock(return_value=mock_bm)
-            mock_bm.__aexit__ = AsyncMock(return_value=None)
-
-            session = CrawlerSession()
-            await session.start()
-            await session.stop()
+        await started_session.stop()
 
-            assert session._bm is None
-            assert session._exit_stack is None
-            assert session.is_running() is False
+        assert started_session._bm is None
+        assert started_session._exit_stack is None
+        assert started_session.is_running() is False
 
 
+@_asyncio_module_loop
 class TestCrawlerSessionLock:
     """测试并发锁确保操作串行化。"""
 
     async def test_lock_serializes_concurrent_access(self):
         """并发调用 browser_lock() 时，操作应串行执行（无交错）。"""
         session = CrawlerSession()
-        execution_order: list[str] = []
+        execution_order: list[tuple[str, str]] = []
 
-        async def task(name: str) -> None:
+        async def task(name: str, started: asyncio.Event, release: asyncio.Event) -> None:
             async with session.browser_lock():
-                execution_order.append(f"enter_{name}")
-                await asyncio.sleep(0.01)
-                execution_order.append(f"exit_{name}")
+                execution_order.append(("enter", name))
+                started.set()
+                await release.wait()
+                execution_order.append(("exit", name))
 
-        await asyncio.gather(task("a"), task("b"))
+        # Event 握手代替定时 sleep：a 持锁后通知，b 在 a 释放前已排队等待锁
+        a_started, a_release = asyncio.Event(), asyncio.Event()
+        b_started, b_release = asyncio.Event(), asyncio.Event()
 
-        # 验证没有交错：enter_x 之后的下一个事件必须是 exit_x
-        a_enter = execution_order.index("enter_a")
-        a_exit = execution_order.index("exit_a")
-        b_enter = execution_order.index("enter_b")
-        b_exit = execution_order.index("exit_b")
+        task_a = asyncio.create_task(task("a", a_started, a_release))
+        await a_started.wait()
+        assert session._lock.locked()
 
-        # a 先完成后 b 才开始，或 b 先完成后 a 才开始
-        assert (a_exit < b_enter) or (b_exit < a_enter)
+        task_b = asyncio.create_task(task("b", b_started, b_release))
+        a_release.set()
+        await b_started.wait()
+        b_release.set()
+        await asyncio.gather(task_a, task_b)
 
-    async def test_lock_yields_browser_manager(self):
-        """browser_lock() 应 yield BrowserManager 实例（启动后）。"""
-        with patch("src.session.BrowserManager") as MockBM:
-            mock_bm = AsyncMock()
-            MockBM.return_value = mock_bm
-            mock_bm.__aenter__ = AsyncMock(return_value=mock_bm)
-            mock_bm.__aexit__ = AsyncMock(return_value=None)
+        # 验证没有交错：a 完整执行后 b 才进入临界区（握手保证 a 先持锁）
+        assert execution_order == [("enter", "a"), ("exit", "a"), ("enter", "b"), ("exit", "b")]
 
-            session = CrawlerSession()
-            await session.start()
+    async def test_lock_yields_browser_manager(self, mock_browser_manager, started_session):
+        """browser_lock() 应 yield BrowserManager 实例（启动后）。"""
+        mock_bm, _ = mock_browser_manager
 
-            async with session.browser_lock() as bm:
-                assert bm is mock_bm
+        async with started_session.browser_lock() as bm:
+            assert bm is mock_bm
 
 
+@_asyncio_module_loop
 class TestCrawlerSessionLoginStatus:
     """测试登录态检查接口。"""
 
@@ -162,62 +139,90 @@ class TestCrawlerSessionLoginStatus:
         assert "message" in result
         assert isinstance(result["message"], str)
 
-    async def test_check_login_returns_true_when_logged_in(self):
+    async def test_check_login_returns_true_when_logged_in(
+        self, mock_browser_manager, started_session, patched_is_logged_in
+    ):
         """已登录时，返回 logged_in=True, browser_running=True。"""
-        with patch("src.session.BrowserManager") as MockBM:
-            with patch("src.session.is_logged_in", return_value=True):
-                mock_bm = AsyncMock()
-                MockBM.return_value = mock_bm
-                mock_bm.__aenter__ = AsyncMock(return_value=mock_bm)
-                mock_bm.__aexit__ = AsyncMock(return_value=None)
-                mock_page = AsyncMock()
-                mock_bm.new_page = AsyncMock(return_value=mock_page)
-
-                session = CrawlerSession()
-                await session.start()
-                result = await session.check_login_status()
-
-                assert result["logged_in"] is True
-                assert result["browser_running"] is True
-                assert "message" in result
-
-    async def test_check_login_returns_false_when_not_logged_in(self):
+        mock_bm, _ = mock_browser_manager
+        patched_is_logged_in(True)
+        mock_page = AsyncMock()
+        mock_bm.new_page = AsyncMock(return_value=mock_page)
+
+        result = await started_session.check_login_status()
+
+        assert result["logged_in"] is True
+        assert result["browser_running"] is True
+        assert "message" in result
+
+    async def test_check_login_returns_false_when_not_logged_in(
+        self, mock_browser_manager, started_session, patched_is_logged_in
+    ):
         """未登录时，返回 logged_in=False, browser_running=True。"""
-        with patch("src.session.BrowserManager") as MockBM:
-            with patch("src.session.is_logged_in", return_value=False):
-                mock_bm = AsyncMock()
-                MockBM.return_value = mock_bm
-                mock_bm.__aenter__ = AsyncMock(return_value=mock_bm)
-                mock_bm.__aexit__ = AsyncMock(return_value=None)
-                mock_page = AsyncMock()
-                mock_bm.new_page = AsyncMock(return_value=mock_page)
-
-                session = CrawlerSession()
-                await session.start()
-                result = await session.check_login_status()
-
-                assert result["logged_in"] is False
-                assert result["browser_running"] is True
-                assert "message" in result
-
-    async def test_check_login_closes_page_after_check(self):
+        mock_bm, _ = mock_browser_manager
+        patched_is_logged_in(False)
+        mock_page = AsyncMock()
+        mock_bm.new_page = AsyncMock(return_value=mock_page)
+
+        result = await started_session.check_login_status()
+
+        assert result["logged_in"] is False
+        assert result["browser_running"] is True
+        assert "message" in result
+
+    async def test_check_login_closes_page_after_check(
+        self, mock_browser_manager, started_session, patched_is_logged_in
+    ):
         """登录态检查完成后应关闭页面，防止资源泄漏。"""
-        with patch("src.session.BrowserManager") as MockBM:
-            with patch("src.session.is_logged_in", return_value=True):
-                mock_bm = AsyncMock()
-                MockBM.return_value = mock_bm
-                mock_bm.__aenter__ = AsyncMock(return_value=mock_bm)
-                mock_bm.__aexit__ = AsyncMock(return_value=None)
-                mock_page = AsyncMock()
-                mock_bm.new_page = AsyncMock(return_value=mock_page)
+        mock_bm, _ = mock_browser_manager
+        patched_is_logged_in(True)
+        mock_page = AsyncMock()
+        mock_bm.new_page = AsyncMock(return_value=mock_page)
+
+        await started_session.check_login_status()
+
+        mock_page.close.assert_called_once()
+
+    async def test_logged_in_result_cached_until_expired(
+        self, mock_browser_manager, started_session, patched_is_logged_in
+    ):
+        """已登录结果在有效期内直接复用；未登录结果不缓存，每次重新探测。"""
+        mock_bm, _ = mock_browser_manager
+        probe = patched_is_logged_in(True)
+        mock_bm.new_page = AsyncMock(return_value=AsyncMock())
+        mock_bm.context.browser.is_connected = MagicMock(return_value=True)
+
+        await started_session.check_login_status()
+        cached = await started_session.check_login_status()
+
+        assert cached["logged_in"] is True
+        assert probe.await_count == 1
+
+        # 锁内探测发现失效后应清除缓存
+        probe.return_value = False
+        assert await started_session._check_login_in_lock() is False
+        await started_session.check_login_status()
+
+        assert probe.await_count == 3
+
+    async def test_cached_login_not_used_after_browser_crash(
+        self, mock_browser_manager, started_session, patched_is_logged_in
+    ):
+        """浏览器断开后不复用"已登录"缓存，重新进入锁内探测。"""
+        mock_bm, _ = mock_browser_manager
+        probe = patched_is_logged_in(True)
+        mock_bm.new_page = AsyncMock(return_value=AsyncMock())
+        mock_bm.context.browser.is_connected = MagicMock(return_value=True)
+        await started_session.check_login_status()
 
-                session = CrawlerSession()
-                await session.start()
-                await session.check_login_status()
+        # 模拟浏览器崩溃，并让健康检查缓存过期
+        mock_bm.context.browser.is_connected.return_value = False
+        started_session._last_health_ok_ts = 0.0
+        await started_session.check_login_status()
 
-                mock_page.close.assert_called_once()
+        assert probe.await_count == 2
 
 
+@_asyncio_module_loop
 class TestCrawlerSessionRaceConditionGuards:
     """测试各方法的竞态条件二次防护（_bm is None 路径）。"""
 
@@ -4,7 +4,7 @@ CrawlerSession Phase C 方法测试
 测试 crawl_keyword 和 get_saved_data 方法
 
 测试策略：
-  - BrowserManager 和 src 模块均 mock，不依赖真实浏览器
+  - BrowserManager 和 src 模块均 mock（BrowserManager 由 conftest.mock_browser_manager 替换），不依赖真实浏览器
   - get_saved_data 使用 tmp_path fixture 测试文件系统操作
   - 覆盖：正常路径、浏览器未启动错误、参数边界、竞态条件
 """
@@ -16,15 +16,41 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+import src.session
 from src.session import CrawlerSession
+from tests.helpers import assert_error_dict
 
+# 显式标记为 asyncio 测试（不依赖 asyncio_mode=auto 的运行期探测），
+# 并让本模块的异步测试共享同一个事件循环，避免逐测试创建 / 销毁循环
+pytestmark = pytest.mark.asyncio(loop_scope="module")
 
-def _make_mock_bm():
-    """创建支持 async with 协议的 Mock BrowserManager。"""
-    mock_bm = AsyncMock()
-    mock_bm.__aenter__ = AsyncMock(return_value=mock_bm)
-    mock_bm.__aexit__ = AsyncMock(return_value=None)
-    return mock_bm
+
+class _DummyStorage:
+    """Storage 的轻量替身：只记录 save_all 调用，不写文件（比 MagicMock 构造开销小得多）。"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.calls: list[tuple] = []
+
+    def save_all(self, *args, **kwargs) -> None:
+        self.calls.append(("save_all", args, kwargs))
+
+
+@pytest.fixture(scope="module")
+def sample_search_results():
+    """搜索阶段样例结果（测试只读，模块内共享同一份列表）。"""
+    return [
+        {"note_id": "1", "title": "笔记一", "note_url": "https://example.com/1"},
+        {"note_id": "2", "title": "笔记二", "note_url": "https://example.com/2"},
+    ]
+
+
+@pytest.fixture(scope="module")
+def sample_note_details():
+    """详情阶段样例结果：2 条笔记，共 3 条评论（测试只读）。"""
+    return [
+        {"note_id": "1", "title": "笔记一", "comments": [{"id": "c1"}, {"id": "c2"}]},
+        {"note_id": "2", "title": "笔记二", "comments": [{"id": "c3"}]},
+    ]
 
 
 # ============================================================
@@ -40,183 +66,155 @@ class TestCrawlerSessionCrawlKeyword:
         session = CrawlerSession()
         result = await session.crawl_keyword("测试")
 
-        assert isinstance(result, dict)
-        assert result.get("error") is True
-        assert "message" in result
+        assert_error_dict(result)
 
-    async def test_calls_search_and_fetch_details(self):
+    async def test_calls_search_and_fetch_details(
+        self, started_session, sample_search_results, sample_note_details
+    ):
         """应按顺序调用 search_notes 和 fetch_note_details，参数正确传递。"""
-        mock_search_results = [
-            {"note_id": "1", "title": "笔记一", "note_url": "https://example.com/1"},
-        ]
-        mock_note_details = [
-            {"note_id": "1", "title": "笔记一", "comments": []},
-        ]
-
-        with patch("src.session.BrowserManager") as MockBM:
-            with patch("src.search.search_notes", new=AsyncMock(return_value=mock_search_results)) as mock_search:
-                with patch("src.note.fetch_note_details", new=AsyncMock(return_value=mock_note_details)) as mock_fetch:
-                    with patch("src.session.Storage") as MockStorage:
-                        mock_bm = _make_mock_bm()
-                        MockBM.return_value = mock_bm
-                        MockStorage.return_value = MagicMock()
-
-                        session = CrawlerSession()
-                        await session.start()
-                        await session.crawl_keyword("测试关键词", max_notes=1, max_comments=5)
-
-                        mock_search.assert_called_once()
-                        assert mock_search.call_args[1]["keyword"] == "测试关键词"
-                        assert mock_search.call_args[1]["max_count"] == 1
-                        mock_fetch.assert_called_once()
-                        assert mock_fetch.call_args[1]["max_comments"] == 5
-
-    async def test_returns_structured_result(self):
+        with (
+            patch("src.search.search_notes", new=AsyncMock(return_value=sample_search_results)) as mock_search,
+            patch("src.note.fetch_note_details", new=AsyncMock(return_value=sample_note_details)) as mock_fetch,
+            patch("src.session.Storage", _DummyStorage),
+        ):
+            await started_session.crawl_keyword("测试关键词", max_notes=1, max_comments=5)
+
+            mock_search.assert_called_once()
+            assert mock_search.call_args[1]["keyword"] == "测试关键词"
+            assert mock_search.call_args[1]["max_count"] == 1
+            mock_fetch.assert_called_once()
+            assert mock_fetch.call_args[1]["max_comments"] == 5
+
+    async def test_returns_structured_result(
+        self, started_session, sample_search_results, sample_note_details
+    ):
         """返回值应包含 keyword/search_count/detail_count/total_comments/summary 键。"""
-        mock_search_results = [{"note_id": "1"}, {"note_id": "2"}]
-        mock_note_details = [
-            {"note_id": "1", "comments": [{"id": "c1"}, {"id": "c2"}]},
-            {"note_id": "2", "comments": [{"id": "c3"}]},
-        ]
-
-        with patch("src.session.BrowserManager") as MockBM:
-            with patch("src.search.search_notes", new=AsyncMock(return_value=mock_search_results)):
-                with patch("src.note.fetch_note_details", new=AsyncMock(return_value=mock_note_details)):
-                    with patch("src.session.Storage") as MockStorage:
-                        mock_bm = _make_mock_bm()
-                        MockBM.return_value = mock_bm
-                        MockStorage.return_value = MagicMock()
-
-                        session = CrawlerSession()
-                        await session.start()
-                        result = await session.crawl_keyword("测试")
-
-                        assert result["keyword"] == "测试"
-                        assert result["search_count"] == 2
-                        assert result["detail_count"] == 2
-                        assert result["total_comments"] == 3
-                        assert "summary" in result
-
-    async def test_limits_max_notes_to_20(self):
+        with (
+            patch("src.search.search_notes", new=AsyncMock(return_value=sample_search_results)),
+            patch("src.note.fetch_note_details", new=AsyncMock(return_value=sample_note_details)),
+            patch("src.session.Storage", _DummyStorage),
+        ):
+            result = await started_session.crawl_keyword("测试")
+
+            assert result["keyword"] == "测试"
+            assert result["search_count"] == 2
+            assert result["detail_count"] == 2
+            assert result["total_comments"] == 3
+            assert "summary" in result
+
+    async def test_limits_max_notes_to_20(self, started_session):
         """max_notes 超过 20 时，传给 search_notes 的 max_count 应截断到 20。"""
-        with patch("src.session.BrowserManager") as MockBM:
-            with patch("src.search.search_notes", new=AsyncMock(return_value=[])) as mock_search:
-                with patch("src.note.fetch_note_details", new=AsyncMock(return_value=[])):
-                    with patch("src.session.Storage") as MockStorage:
-                        mock_bm = _make_mock_bm()
-                        MockBM.return_value = mock_bm
-                        MockStorage.return_value = MagicMock()
-
-                        session = CrawlerSession()
-                        await session.start()
-                        await session.crawl_keyword("test", max_notes=50)
-
-                        call_kwargs = mock_search.call_args[1]
-                        assert call_kwargs["max_count"] == 20
-
-    async def test_handles_empty_search_results(self):
+        with (
+            patch("src.search.search_notes", new=AsyncMock(return_value=[])) as mock_search,
+            patch("src.note.fetch_note_details", new=AsyncMock(return_value=[])),
+            patch("src.session.Storage", _DummyStorage),
+        ):
+            await started_session.crawl_keyword("test", max_notes=50)
+
+            call_kwargs = mock_search.call_args[1]
+            assert call_kwargs["max_count"] == 20
+
+    async def test_handles_empty_search_results(self, started_session):
         """搜索无结果时应返回有效的空结构（非 error），不崩溃。"""
-        with patch("src.session.BrowserManager") as MockBM:
-            with patch("src.search.search_notes", new=AsyncMock(return_value=[])):
-                with patch("src.note.fetch_note_details", new=AsyncMock(return_value=[])):
-                    with patch("src.session.Storage") as MockStorage:
-                        mock_bm = _make_mock_bm()
-                        MockBM.return_value = mock_bm
-                        MockStorage.return_value = MagicMock()
-
-                        session = CrawlerSession()
-                        await session.start()
-                        result = await session.crawl_keyword("无结果关键词")
-
-                        assert result.get("error") is not True
-                        assert result["search_count"] == 0
-                        assert result["detail_count"] == 0
-                        assert result["total_comments"] == 0
-
-    async def test_saves_data_via_storage(self):
+        with (
+            patch("src.search.search_notes", new=AsyncMock(return_value=[])),
+            patch("src.note.fetch_note_details", new=AsyncMock(return_value=[])),
+            patch("src.session.Storage", _DummyStorage),
+        ):
+            result = await started_session.crawl_keyword("无结果关键词")
+
+            assert result.get("error") is not True
+            assert result["search_count"] == 0
+            assert result["detail_count"] == 0
+            assert result["total_comments"] == 0
+
+    async def test_saves_data_via_storage(
+        self, started_session, sample_search_results, sample_note_details
+    ):
         """应调用 Storage.save_all 持久化数据，参数为关键词 + 两个列表。"""
-        mock_search_results = [{"note_id": "1"}]
-        mock_note_details = [{"note_id": "1", "comments": []}]
-
-        with patch("src.session.BrowserManager") as MockBM:
-            with patch("src.search.search_notes", new=AsyncMock(return_value=mock_search_results)):
-                with patch("src.note.fetch_note_details", new=AsyncMock(return_value=mock_note_details)):
-                    with patch("src.session.Storage") as MockStorage:
-                        mock_bm = _make_mock_bm()
-                        MockBM.return_value = mock_bm
-                        mock_storage = MagicMock()
-                        MockStorage.return_value = mock_storage
-
-                        session = CrawlerSession()
-                        await session.start()
-                        await session.crawl_keyword("保存测试")
-
-                        mock_storage.save_all.assert_called_once_with(
-                            "保存测试", mock_search_results, mock_note_details
-                        )
-
-    async def test_uses_browser_lock_during_crawl(self):
+        instances: list[_DummyStorage] = []
+
+        def make_storage(*args, **kwargs) -> _DummyStorage:
+            storage = _DummyStorage(*args, **kwargs)
+            instances.append(storage)
+            return storage
+
+        with (
+            patch("src.search.search_notes", new=AsyncMock(return_value=sample_search_results)),
+            patch("src.note.fetch_note_details", new=AsyncMock(return_value=sample_note_details)),
+            patch("src.session.Storage", make_storage),
+        ):
+            await started_session.crawl_keyword("保存测试")
+
+            assert len(instances) == 1
+            assert instances[0].calls == [
+                ("save_all", ("保存测试", sample_search_results, sample_note_details), {})
+            ]
+
+    async def test_uses_browser_lock_during_crawl(self, started_session):
         """采集期间应持有 browser lock（保证串行化）。"""
         lock_acquired = False
 
-        with patch("src.session.BrowserManager") as MockBM:
-            with patch("src.search.search_notes") as mock_search:
-                with patch("src.note.fetch_note_details", new=AsyncMock(return_value=[])):
-                    with patch("src.session.Storage") as MockStorage:
-                        mock_bm = _make_mock_bm()
-                        MockBM.return_value = mock_bm
-                        MockStorage.return_value = MagicMock()
-
-                        session = CrawlerSession()
-                        await session.start()
+        with (
+            patch("src.search.search_notes") as mock_search,
+            patch("src.note.fetch_note_details", new=AsyncMock(return_value=[])),
+            patch("src.session.Storage", _DummyStorage),
+        ):
+            async def check_lock(*args, **kwargs):
+                nonlocal lock_acquired
+                lock_acquired = started_session._lock.locked()
+                return []
 
-                        async def check_lock(*args, **kwargs):
-                            nonlocal lock_acquired
-                            lock_acquired = session._lock.locked()
-                            return []
+            mock_search.side_effect = check_lock
+            await started_session.crawl_keyword("lock_test")
 
-                        mock_search.side_effect = check_lock
-                        await session.crawl_keyword("lock_test")
-
-                        assert lock_acquired is True
+            assert lock_acquired is True
 
     async def test_returns_error_when_bm_none_race_condition(self):
         """_running=True 但 _bm=None（竞态），应返回 error dict。
 
         Phase D: _ensure_browser() 会尝试自动恢复，mock 使恢复失败。
         """
-        with patch("src.session.BrowserManager") as MockBM:
-            mock_bm = AsyncMock()
-            mock_bm.__aenter__ = AsyncMock(side_effect=RuntimeError("恢复失败"))
-            mock_bm.__aexit__ = AsyncMock(return_value=None)
-            MockBM.return_value = mock_bm
+        mock_bm = AsyncMock()
+        mock_bm.__aenter__.side_effect = RuntimeError("恢复失败")
 
+        with patch.object(src.session, "BrowserManager", MagicMock(return_value=mock_bm)):
             session = CrawlerSession()
             session._running = True
             session._bm = None
 
             result = await session.crawl_keyword("test")
 
-            assert isinstance(result, dict)
-            assert result.get("error") is True
-            assert result.get("code") == "BROWSER_CRASHED"
+            assert_error_dict(result, code="BROWSER_CRASHED")
+
+
+# ============================================================
+# 默认参数（search_notes / get_note_detail / crawl_keyword）
+# ============================================================
+
+
+class TestCrawlerSessionDefaultArgs:
+    """测试各采集方法不传可选参数时透传给底层模块的默认值。"""
 
-    async def test_default_max_notes_is_10(self):
-        """默认 max_notes 应为 10。"""
-        with patch("src.session.BrowserManager") as MockBM:
-            with patch("src.search.search_notes", new=AsyncMock(return_value=[])) as mock_search:
-                with patch("src.note.fetch_note_details", new=AsyncMock(return_value=[])):
-                    with patch("src.session.Storage") as MockStorage:
-                        mock_bm = _make_mock_bm()
-                        MockBM.return_value = mock_bm
-                        MockStorage.return_value = MagicMock()
+    @pytest.mark.parametrize(
+        "method,target,kwarg,expected",
+        [
+            ("search_notes", "src.search.search_notes", "max_count", 20),
+            ("get_note_detail", "src.note.fetch_single_note", "max_comments", 20),
+            ("crawl_keyword", "src.search.search_notes", "max_count", 10),
+        ],
+    )
+    async def test_default_kwargs(self, started_session, method, target, kwarg, expected):
+        """search_notes 默认 max_count=20，get_note_detail 默认 max_comments=20，crawl_keyword 默认 max_notes=10。"""
+        arg = "https://www.xiaohongshu.com/explore/abc123" if method == "get_note_detail" else "test"
 
-                        session = CrawlerSession()
-                        await session.start()
-                        await session.crawl_keyword("test")
+        with (
+            patch(target, new=AsyncMock(return_value=[])) as mock_target,
+            patch("src.session.Storage", _DummyStorage),
+        ):
+            await getattr(started_session, method)(arg)
 
-                        call_kwargs = mock_search.call_args[1]
-                        assert call_kwargs["max_count"] == 10
+            assert mock_target.call_args[1][kwarg] == expected
 
 
 # ============================================================
@@ -287,6 +285,20 @@ class TestCrawlerSessionGetSavedData:
         assert file_info["keyword"] == "测试关键词"
         assert file_info["size_bytes"] > 0
 
+    async def test_path_and_size_taken_from_dir_entry(self, tmp_path):
+        """path 为 DirEntry.path 原样字符串，size_bytes 为 stat 的 st_size。"""
+        raw_dir = tmp_path / "raw"
+        raw_dir.mkdir(parents=True)
+        test_file = raw_dir / "测试关键词_20240315_143022.json"
+        test_file.write_text('{"count": 5}', encoding="utf-8")
+
+        result = await CrawlerSession().get_saved_data(data_dir=tmp_path)
+
+        file_info = result["files"][0]
+        assert type(file_info["path"]) is str
+        assert file_info["path"] == str(test_file)
+        assert file_info["size_bytes"] == test_file.stat().st_size
+
     async def test_extracts_keyword_from_notes_prefix(self, tmp_path):
         """notes_ 前缀的文件应正确去除前缀后提取 keyword。"""
         raw_dir = tmp_path / "raw"
@@ -315,6 +327,60 @@ class TestCrawlerSessionGetSavedData:
 
         assert len(result["files"]) == 1
 
+    async def test_created_at_parsed_from_filename(self, tmp_path):
+        """created_at 取自文件名中的采集时间戳；不含时间戳的文件不被识别。"""
+        raw_dir = tmp_path / "raw"
+        raw_dir.mkdir(parents=True)
+
+        (raw_dir / "关键词_20240315_143022.json").write_text("{}", encoding="utf-8")
+        (raw_dir / "无时间戳.json").write_text("{}", encoding="utf-8")
+
+        session = CrawlerSession()
+        result = await session.get_saved_data(data_dir=tmp_path)
+
+        assert len(result["files"]) == 1
+        assert result["files"][0]["created_at"] == "2024-03-15T14:30:22"
+
+    async def test_failed_subdir_scan_does_not_drop_other_subdir(self, tmp_path):
+        """一个子目录扫描失败时，另一个子目录的结果仍应返回。"""
+        (tmp_path / "raw").mkdir(parents=True)
+        (tmp_path / "processed").mkdir(parents=True)
+        (tmp_path / "processed" / "关键词_20240315_143022.xlsx").write_bytes(b"x")
+
+        real_scan = src.session._scan_data_dir
+
+        def flaky_scan(dir_path, needle=None):
+            if dir_path.name == "raw":
+                raise PermissionError("denied")
+            return real_scan(dir_path, needle)
+
+        with patch.object(src.session, "_scan_data_dir", flaky_scan):
+            result = await CrawlerSession().get_saved_data(data_dir=tmp_path)
+
+        assert [f["keyword"] for f in result["files"]] == ["关键词"]
+
+    async def test_iter_saved_data_yields_batches(self, tmp_path):
+        """iter_saved_data 按 batch_size 分批产出，提前 break 时后续批次不再 stat。"""
+        raw_dir = tmp_path / "raw"
+        raw_dir.mkdir(parents=True)
+        for i in range(5):
+            (raw_dir / f"关键词{i}_20240315_143022.json").write_text("{}", encoding="utf-8")
+
+        session = CrawlerSession()
+        batches = [
+            batch async for batch in session.iter_saved_data(data_dir=tmp_path, batch_size=2)
+        ]
+
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+
+        stat_spy = AsyncMock(wraps=src.session._bounded_stat)
+        with patch.object(src.session, "_bounded_stat", stat_spy):
+            async for first in session.iter_saved_data(data_dir=tmp_path, batch_size=2):
+                break
+
+        assert len(first) == 2
+        assert stat_spy.await_count == 2
+
     async def test_returns_files_key(self, tmp_path):
         """返回值必须包含 files 键。"""
         session = CrawlerSession()
@@ -21,8 +21,7 @@ from src.session import CrawlerSession
 def _make_mock_bm(*, connected: bool = True) -> AsyncMock:
     """创建标准 mock BrowserManager，可控制 is_connected 状态。"""
     mock_bm = AsyncMock()
-    mock_bm.__aenter__ = AsyncMock(return_value=mock_bm)
-    mock_bm.__aexit__ = AsyncMock(return_value=None)
+    mock_bm.__aenter__.return_value = mock_bm
 
     # 模拟 context.browser.is_connected()
     mock_browser = MagicMock()
@@ -62,6 +61,19 @@ class TestBrowserHealthCheck:
 
             assert await session._is_browser_healthy() is False
 
+    async def test_healthy_result_cached_within_ttl(self):
+        """健康检查通过后，TTL 内再次检查不重复调用 is_connected()。"""
+        with patch("src.session.BrowserManager") as MockBM:
+            mock_bm = _make_mock_bm(connected=True)
+            MockBM.return_value = mock_bm
+
+            session = CrawlerSession()
+            await session.start()
+
+            assert await session._is_browser_healthy() is True
+            assert await session._is_browser_healthy() is True
+            assert mock_bm.context.browser.is_connected.call_count == 1
+
     async def test_none_bm_returns_false(self):
         """_bm 为 None 时，_is_browser_healthy() 返回 False。"""
         session = CrawlerSession()
@@ -129,8 +141,7 @@ class TestBrowserAutoRecovery:
                 return _make_mock_bm(connected=False)
             # 第二次创建抛异常（恢复失败）
             mock_bm = AsyncMock()
-            mock_bm.__aenter__ = AsyncMock(side_effect=RuntimeError("恢复失败"))
-            mock_bm.__aexit__ = AsyncMock(return_value=None)
+            mock_bm.__aenter__.side_effect = RuntimeError("恢复失败")
             return mock_bm
 
         with patch("src.session.BrowserManager", side_effect=make_bm_side_effect):
@@ -210,8 +221,7 @@ class TestStructuredErrors:
             if call_count == 1:
                 return _make_mock_bm(connected=False)
             mock_bm = AsyncMock()
-            mock_bm.__aenter__ = AsyncMock(side_effect=RuntimeError("恢复失败"))
-            mock_bm.__aexit__ = AsyncMock(return_value=None)
+            mock_bm.__aenter__.side_effect = RuntimeError("恢复失败")
             return mock_bm
 
         with patch("src.session.BrowserManager", side_effect=make_bm_side_effect):
@@ -10,6 +10,8 @@ Storage 模块单元测试
 from __future__ import annotations
 
 import json
+import shutil
+import zipfile
 from pathlib import Path
 
 import pytest
@@ -138,6 +140,29 @@ class TestStorageInit:
         Storage({"output_dir": str(tmp_path / "data")})
         assert (tmp_path / "data" / "processed").is_dir()
 
+    def test_reinit_over_existing_directories(self, tmp_path):
+        """目录已存在时重复初始化不报错（mkdir exist_ok）。"""
+        Storage({"output_dir": str(tmp_path / "data")})
+        Storage({"output_dir": str(tmp_path / "data")})
+        assert (tmp_path / "data" / "processed").is_dir()
+
+    def test_recreates_relative_dir_after_cwd_change(self, tmp_path, monkeypatch):
+        """相对 output_dir 在切换工作目录后应在新位置重新创建。"""
+        for name in ("a", "b"):
+            (tmp_path / name).mkdir()
+            monkeypatch.chdir(tmp_path / name)
+            Storage({"output_dir": "out"})
+            assert (tmp_path / name / "out" / "raw").is_dir()
+
+    def test_recreates_dirs_removed_while_running(self, tmp_path):
+        """长期运行期间输出目录被删除后，新建 Storage 应重新创建并可正常保存。"""
+        Storage({"output_dir": str(tmp_path / "data")})
+        shutil.rmtree(tmp_path / "data")
+        storage = Storage({"output_dir": str(tmp_path / "data")})
+        storage.save_all("Python", SAMPLE_SEARCH_RESULTS, SAMPLE_NOTE_DETAILS)
+        assert list((tmp_path / "data" / "raw").glob("*.json"))
+        assert list((tmp_path / "data" / "processed").glob("*.xlsx"))
+
     def test_default_output_dir_is_data(self, tmp_path, monkeypatch):
         """未指定 output_dir 时默认使用 'data'。"""
         monkeypatch.chdir(tmp_path)
@@ -154,6 +179,11 @@ class TestStorageInit:
         s = Storage({"output_dir": str(tmp_path)})
         assert s._save_xlsx is True
 
+    def test_xlsx_backend_defaults_to_xlsxwriter(self, tmp_path):
+        """xlsx_backend 默认为 xlsxwriter。"""
+        s = Storage({"output_dir": str(tmp_path)})
+        assert s._xlsx_backend == "xlsxwriter"
+
     def test_save_json_can_be_disabled(self, tmp_path):
         """save_raw_json=False 可关闭 JSON 写入。"""
         s = Storage({"output_dir": str(tmp_path), "save_raw_json": False})
@@ -220,6 +250,35 @@ class TestWriteJson:
         raw_files = list((tmp_path / "raw").glob("*.json"))
         assert len(raw_files) == 0
 
+    def test_search_and_notes_json_share_crawled_at(self, tmp_path):
+        """同一次 save_all 写出的两个 JSON 文件 crawled_at 一致。"""
+        storage = Storage({"output_dir": str(tmp_path), "save_xlsx": False})
+        storage.save_all("Python", SAMPLE_SEARCH_RESULTS, SAMPLE_NOTE_DETAILS)
+        search_file = next((tmp_path / "raw").glob("Python_*.json"))
+        notes_file = next((tmp_path / "raw").glob("notes_Python_*.json"))
+        search_data = json.loads(search_file.read_text(encoding="utf-8"))
+        notes_data = json.loads(notes_file.read_text(encoding="utf-8"))
+        assert search_data["crawled_at"] == notes_data["crawled_at"]
+
+    def test_combined_json_writes_single_file(self, tmp_path):
+        """combined_json=True 时只写一个 JSON 文件，同时包含 results 与 notes。"""
+        storage = Storage({"output_dir": str(tmp_path), "save_xlsx": False, "combined_json": True})
+        storage.save_all("Python", SAMPLE_SEARCH_RESULTS, SAMPLE_NOTE_DETAILS)
+        json_files = list((tmp_path / "raw").glob("*.json"))
+        assert len(json_files) == 1
+        assert not json_files[0].name.startswith("notes_")
+        data = json.loads(json_files[0].read_text(encoding="utf-8"))
+        assert data["keyword"] == "Python"
+        assert data["results"] == SAMPLE_SEARCH_RESULTS
+        assert data["notes"] == SAMPLE_NOTE_DETAILS
+        assert "crawled_at" in data
+
+    def test_combined_json_skipped_when_no_data(self, tmp_path):
+        """combined_json=True 且无任何数据时不写 JSON 文件。"""
+        storage = Storage({"output_dir": str(tmp_path), "save_xlsx": False, "combined_json": True})
+        storage.save_all("Python", [], [])
+        assert list((tmp_path / "raw").glob("*.json")) == []
+
     def test_json_preserves_unicode(self, tmp_path):
         """中文内容应正确写入 UTF-8 JSON。"""
         storage = Storage({"output_dir": str(tmp_path), "save_xlsx": False})
@@ -228,6 +287,15 @@ class TestWriteJson:
         content = json_file.read_text(encoding="utf-8")
         assert "Python 入门教程" in content
 
+    def test_json_written_as_raw_utf8_bytes(self, tmp_path):
+        """JSON 以二进制 UTF-8 写出：无 BOM、中文不转义、换行为 LF。"""
+        storage = Storage({"output_dir": str(tmp_path), "save_xlsx": False})
+        storage.save_all("小红书", SAMPLE_SEARCH_RESULTS, [])
+        raw = next((tmp_path / "raw").glob("*.json")).read_bytes()
+        assert raw.startswith(b"{")
+        assert "入门教程".encode("utf-8") in raw
+        assert b"\r\n" not in raw
+
 
 class TestWriteXlsx:
     """测试 Excel 写入功能。"""
@@ -312,6 +380,26 @@ class TestWriteXlsx:
         xlsx_files = list((tmp_path / "processed").glob("*.xlsx"))
         assert len(xlsx_files) == 1
 
+    def test_parallel_write_error_propagates(self, tmp_path, monkeypatch):
+        """并行写入时任一任务的异常应抛回 save_all 调用方，其余文件照常写出。"""
+        storage = Storage({"output_dir": str(tmp_path)})
+
+        def _boom(*_args, **_kwargs):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(storage, "_write_xlsx", _boom)
+        with pytest.raises(OSError, match="disk full"):
+            storage.save_all("Python", SAMPLE_SEARCH_RESULTS, SAMPLE_NOTE_DETAILS)
+        assert len(list((tmp_path / "raw").glob("*.json"))) == 2
+
+    def test_no_xlsx_for_empty_data_when_create_empty_disabled(self, tmp_path):
+        """create_empty_xlsx=False 且数据为空时不创建 xlsx 文件。"""
+        storage = Storage(
+            {"output_dir": str(tmp_path), "save_raw_json": False, "create_empty_xlsx": False}
+        )
+        storage.save_all("Python", [], [])
+        assert list((tmp_path / "processed").glob("*.xlsx")) == []
+
     def test_xlsx_column_width_is_set(self, tmp_path):
         """列宽应被自动设置（不为默认 None）。"""
         storage = Storage({"output_dir": str(tmp_path), "save_raw_json": False})
@@ -322,3 +410,84 @@ class TestWriteXlsx:
         col_width = ws.column_dimensions["A"].width
         assert col_width is not None
         assert col_width > 0
+
+    def test_small_xlsx_uses_shared_strings(self, tmp_path):
+        """数据量较小时 xlsxwriter 使用共享字符串表（非 constant_memory 内联字符串）。"""
+        storage = Storage({"output_dir": str(tmp_path), "save_raw_json": False})
+        storage.save_all("Python", SAMPLE_SEARCH_RESULTS, SAMPLE_NOTE_DETAILS)
+        xlsx_file = list((tmp_path / "processed").glob("*.xlsx"))[0]
+        with zipfile.ZipFile(xlsx_file) as zf:
+            assert "xl/sharedStrings.xml" in zf.namelist()
+
+    @pytest.mark.parametrize("backend", ["openpyxl", "stream"])
+    def test_alternate_backend_produces_same_layout(self, tmp_path, backend):
+        """xlsx_backend=openpyxl / stream 时生成的文件结构与默认后端一致。"""
+        storage = Storage(
+            {"output_dir": str(tmp_path), "save_raw_json": False, "xlsx_backend": backend}
+        )
+        storage.save_all("Python", SAMPLE_SEARCH_RESULTS, SAMPLE_NOTE_DETAILS)
+        xlsx_file = list((tmp_path / "processed").glob("*.xlsx"))[0]
+        wb = load_workbook(xlsx_file)
+        assert wb.sheetnames == ["搜索结果", "笔记详情", "评论"]
+        ws = wb["搜索结果"]
+        assert ws.max_row == 1 + len(SAMPLE_SEARCH_RESULTS)
+        assert ws.freeze_panes == "A2"
+        assert ws.column_dimensions["A"].width > 0
+
+    @pytest.mark.parametrize("backend", ["xlsxwriter", "openpyxl", "stream"])
+    def test_cell_types_follow_python_types(self, tmp_path, backend):
+        """计数列写为数字单元格；形似数字的字符串（如 note_id）仍写为字符串单元格。"""
+        storage = Storage(
+            {"output_dir": str(tmp_path), "save_raw_json": False, "xlsx_backend": backend}
+        )
+        results = [{"note_id": "00123", "title": "1e5", "likes": 42}]
+        storage.save_all("Python", results, SAMPLE_NOTE_DETAILS)
+        wb = load_workbook(list((tmp_path / "processed").glob("*.xlsx"))[0])
+        row = wb["搜索结果"][2]
+        assert (row[0].value, row[0].data_type) == ("00123", "s")
+        assert (row[1].value, row[1].data_type) == ("1e5", "s")
+        assert (row[4].value, row[4].data_type) == (42, "n")
+        ws_notes = wb["笔记详情"]
+        header = [cell.value for cell in ws_notes[1]]
+        for field in ("likes", "collects", "comments_count", "shares"):
+            cell = ws_notes.cell(row=2, column=header.index(field) + 1)
+            assert cell.data_type == "n"
+            assert cell.value == SAMPLE_NOTE_DETAILS[0][field]
+
+    def test_cells_after_long_url_and_long_string_are_kept(self, tmp_path):
+        """超长 URL 不转为超链接、超长字符串截断写入，两者之后的列均不丢失。"""
+        storage = Storage({"output_dir": str(tmp_path), "save_raw_json": False})
+        long_url = "https://www.xiaohongshu.com/explore/" + "a" * 2100
+        results = [
+            {"note_id": "n1", "note_url": long_url, "publish_time": "2025-01-15"},
+            {"note_id": "n2", "author": "长" * 40000, "likes": 7, "note_url": "https://x/n2"},
+        ]
+        storage.save_all("Python", results, [])
+        xlsx_file = list((tmp_path / "processed").glob("*.xlsx"))[0]
+        wb = load_workbook(xlsx_file)
+        ws = wb["搜索结果"]
+        header = [cell.value for cell in ws[1]]
+        row1 = dict(zip(header, (cell.value for cell in ws[2])))
+        row2 = dict(zip(header, (cell.value for cell in ws[3])))
+        assert row1["note_url"] == long_url
+        assert row1["publish_time"] == "2025-01-15"
+        assert len(row2["author"]) == 32767
+        assert row2["likes"] == 7
+        assert row2["note_url"] == "https://x/n2"
+        with zipfile.ZipFile(xlsx_file) as zf:
+            assert not any("worksheets/_rels" in name for name in zf.namelist())
+
+    def test_stream_backend_preserves_cell_values(self, tmp_path):
+        """stream 后端：中文 / XML 特殊字符 / 数字 / tags 字符串原样可读回。"""
+        storage = Storage(
+            {"output_dir": str(tmp_path), "save_raw_json": False, "xlsx_backend": "stream"}
+        )
+        results = [{"note_id": "n1", "title": "<标题> & \"引号\"", "likes": 42}]
+        storage.save_all("Python", results, SAMPLE_NOTE_DETAILS)
+        wb = load_workbook(list((tmp_path / "processed").glob("*.xlsx"))[0])
+        row = [cell.value for cell in wb["搜索结果"][2]]
+        assert row[:2] == ["n1", "<标题> & \"引号\""]
+        assert row[4] == 42
+        ws_notes = wb["笔记详情"]
+        header = [cell.value for cell in ws_notes[1]]
+        assert ws_notes.cell(row=2, column=header.index("tags") + 1).value == "Python;编程;教程"